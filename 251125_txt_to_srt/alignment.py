@@ -0,0 +1,98 @@
+import subprocess
+import wave
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+ANALYSIS_RATE = 8000
+FRAME_MS = 10
+
+def read_pcm(path):
+    """
+    Returns (samples, sample_rate) for a clip as a mono int16 NumPy array.
+    16-bit WAV files are read directly; anything else is decoded with ffmpeg.
+    """
+    try:
+        with wave.open(path, 'rb') as w:
+            if w.getsampwidth() == 2:
+                channels = w.getnchannels()
+                rate = w.getframerate()
+                samples = np.frombuffer(w.readframes(w.getnframes()), dtype='<i2')
+                if channels > 1:
+                    samples = samples[:len(samples) // channels * channels].reshape(-1, channels).mean(axis=1)
+                return samples, rate
+    except (wave.Error, EOFError):
+        pass
+
+    cmd = ['ffmpeg', '-i', path, '-f', 's16le', '-ac', '1', '-ar', str(ANALYSIS_RATE), '-v', 'quiet', '-']
+    raw = subprocess.run(cmd, stdout=subprocess.PIPE, check=True).stdout
+    return np.frombuffer(raw, dtype='<i2'), ANALYSIS_RATE
+
+def energy_envelope(samples, sample_rate, frame_ms=FRAME_MS):
+    """
+    Returns the RMS energy of consecutive frame_ms frames.
+    """
+    frame = max(1, sample_rate * frame_ms // 1000)
+    count = len(samples) // frame
+    frames = np.asarray(samples[:count * frame], dtype=np.float32).reshape(count, frame)
+    return np.sqrt(np.mean(frames * frames, axis=1))
+
+def find_pauses(envelope, threshold_ratio=0.1, min_frames=3):
+    """
+    Returns the centre frame of every run of at least min_frames frames
+    whose energy is below threshold_ratio of the loud (95th percentile) level.
+    """
+    if len(envelope) == 0:
+        return np.empty(0)
+    loud = np.percentile(envelope, 95)
+    quiet = envelope <= loud * threshold_ratio
+
+    # Run boundaries from the edges of the quiet mask
+    edges = np.diff(np.concatenate(([0], quiet.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    keep = (ends - starts) >= min_frames
+    return (starts[keep] + ends[keep]) / 2.0
+
+def align_segments(audio_path, segments, duration, search=0.6, threshold_ratio=0.1, min_pause_ms=30):
+    """
+    Moves the boundaries between split segments to the nearest pause in the
+    clip, within `search` seconds of the proportional split point.
+    Boundaries without a nearby pause keep their proportional position.
+
+    Args:
+        audio_path (str): The sentence clip.
+        segments (list of dict): Output of split_subtitle ('text', 'duration').
+        duration (float): Total duration of the clip.
+
+    Returns:
+        list of dict: The segments with adjusted 'duration' values.
+    """
+    if len(segments) < 2:
+        return segments
+
+    samples, rate = read_pcm(audio_path)
+    envelope = energy_envelope(samples, rate)
+    pauses = find_pauses(envelope, threshold_ratio, max(1, min_pause_ms // FRAME_MS)) * (FRAME_MS / 1000.0)
+
+    bounds = np.cumsum([s['duration'] for s in segments])[:-1]
+    if len(pauses):
+        # Nearest pause for every boundary at once
+        idx = np.searchsorted(pauses, bounds)
+        left = np.clip(idx - 1, 0, len(pauses) - 1)
+        right = np.clip(idx, 0, len(pauses) - 1)
+        nearest = np.where(np.abs(pauses[left] - bounds) <= np.abs(pauses[right] - bounds), pauses[left], pauses[right])
+        snapped = np.where(np.abs(nearest - bounds) <= search, nearest, bounds)
+    else:
+        snapped = bounds
+
+    # Keep boundaries strictly increasing and inside the clip
+    edges = [0.0]
+    for b in snapped:
+        edges.append(min(max(float(b), edges[-1] + 0.001), duration))
+    edges.append(duration)
+
+    return [{'text': s['text'], 'duration': max(0.0, edges[i + 1] - edges[i])}
+            for i, s in enumerate(segments)]
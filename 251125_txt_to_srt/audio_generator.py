@@ -1,28 +1,222 @@
 from gtts import gTTS
 from pydub import AudioSegment
 import os
+import subprocess
+import tempfile
+import time
+import wave
+from audio_probe import iter_mp3_frames, xing_frame_count, probe_duration
+
+class GTTSEngine:
+    """
+    Speech engine backed by Google's text-to-speech service.
+    """
+    name = 'gtts'
+    extension = 'mp3'
+
+    def __init__(self, tld='com'):
+        self.tld = tld
+        self.voice = tld
+
+    def synthesize(self, text, output_file, lang='en'):
+        tts = gTTS(text=text, lang=lang, tld=self.tld)
+        tts.save(output_file)
+
+class FakeEngine:
+    """
+    Offline engine that writes silent WAV clips.
+    The clip length follows the text length, so the pipeline can be
+    exercised without network access.
+    """
+    name = 'fake'
+    extension = 'wav'
+
+    def __init__(self, chars_per_second=15.0, latency=0.0, sample_rate=8000):
+        self.chars_per_second = chars_per_second
+        self.latency = latency
+        self.sample_rate = sample_rate
+        self.voice = f"{chars_per_second}cps"
+
+    def synthesize(self, text, output_file, lang='en'):
+        if self.latency:
+            time.sleep(self.latency)
+        frames = int(len(text) / self.chars_per_second * self.sample_rate)
+        with wave.open(output_file, 'wb') as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(self.sample_rate)
+            w.writeframes(b'\x00\x00' * max(frames, 1))
+
+ENGINES = {
+    'gtts': GTTSEngine,
+    'fake': FakeEngine,
+}
+
+def get_engine(name):
+    """
+    Returns a new engine instance for the given engine name.
+    """
+    if name not in ENGINES:
+        raise ValueError(f"Unknown engine: {name}. Choose from {', '.join(ENGINES)}")
+    return ENGINES[name]()
 
 def generate_audio(text, output_file, lang='en'):
     """
     Generates audio from text using gTTS and saves it to output_file.
     """
-    tts = gTTS(text=text, lang=lang)
-    tts.save(output_file)
+    GTTSEngine().synthesize(text, output_file, lang=lang)
 
 def get_audio_duration(file_path):
     """
     Returns the duration of the audio file in seconds.
+    Reads the WAV/MP3 headers when possible and only decodes other formats.
+    """
+    duration = probe_duration(file_path)
+    if duration is not None:
+        return duration
+    return decode_audio_duration(file_path)
+
+def decode_audio_duration(file_path):
+    """
+    Returns the duration of the audio file in seconds by decoding it fully.
     """
     audio = AudioSegment.from_file(file_path)
     return len(audio) / 1000.0
 
-def concatenate_audio(files, output_file):
+class ClipList:
+    """
+    Clip paths in timeline order, kept in a temporary file rather than in
+    memory. Can be iterated more than once (concatenate_audio may make two
+    passes); close() deletes the file.
+    """
+    def __init__(self, directory=None):
+        self._file = tempfile.TemporaryFile('w+', encoding='utf-8', dir=directory)
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, path):
+        self._file.seek(0, os.SEEK_END)
+        self._file.write(path + '\n')
+        self._count += 1
+
+    def __iter__(self):
+        self._file.flush()
+        self._file.seek(0)
+        for line in self._file:
+            yield line.rstrip('\n')
+
+    def close(self):
+        self._file.close()
+
+CONCAT_MODES = ('stream', 'copy', 'memory')
+
+# gTTS produces 24 kHz mono clips
+STREAM_SAMPLE_RATE = 24000
+STREAM_CHANNELS = 1
+STREAM_CHUNK = 64 * 1024
+
+def concatenate_audio(files, output_file, mode='stream'):
     """
     Concatenates multiple audio files into one and saves it.
+
+    Modes:
+        stream: decode each clip to PCM and pipe it into a single encoder,
+                so memory use does not grow with the total length (default).
+        copy: join MP3 frames without decoding; falls back to stream when
+              the clips are not frame-compatible MP3s. Each clip keeps its
+              encoder delay and padding, so the output runs longer than the
+              summed clip durations and has short gaps between clips.
+        memory: decode everything into one pydub AudioSegment (original behaviour).
     """
+    if mode == 'copy':
+        if output_file.lower().endswith('.mp3') and concatenate_mp3_frames(files, output_file):
+            return
+        mode = 'stream'
+
+    if mode == 'stream':
+        concatenate_audio_stream(files, output_file)
+        return
+
     combined = AudioSegment.empty()
     for file in files:
         audio = AudioSegment.from_file(file)
         combined += audio
-    
+
     combined.export(output_file, format="mp3")
+
+def concatenate_mp3_frames(files, output_file):
+    """
+    Joins MP3 clips by copying their audio frames, without any decode.
+    ID3 tags and Xing/Info/VBRI header frames are dropped.
+    Returns False (writing nothing) if the clips do not share the same
+    MPEG version, layer, sample rate and channel count.
+    """
+    signature = None
+    for file in files:
+        with open(file, 'rb') as f:
+            data = f.read()
+        for _, header in iter_mp3_frames(data):
+            clip_signature = (header.version, header.layer, header.sample_rate, header.channels)
+            if signature is None:
+                signature = clip_signature
+            elif clip_signature != signature:
+                return False
+            break
+        else:
+            return False
+
+    with open(output_file, 'wb') as out:
+        for file in files:
+            with open(file, 'rb') as f:
+                data = f.read()
+            for i, (offset, header) in enumerate(iter_mp3_frames(data)):
+                if i == 0 and xing_frame_count(data, offset, header) is not None:
+                    continue
+                out.write(data[offset:offset + header.length])
+    return True
+
+def _decode_cmd(file, sample_rate, channels):
+    return ['ffmpeg', '-i', file, '-f', 's16le', '-ac', str(channels),
+            '-ar', str(sample_rate), '-v', 'quiet', '-']
+
+def concatenate_audio_stream(files, output_file, sample_rate=STREAM_SAMPLE_RATE, channels=STREAM_CHANNELS):
+    """
+    Decodes each clip with ffmpeg and appends the PCM, chunk by chunk, to a
+    single sink: a WAV file for .wav outputs, otherwise one ffmpeg encoder.
+    Only one chunk is held in memory at a time.
+    """
+    if output_file.lower().endswith('.wav'):
+        sink = wave.open(output_file, 'wb')
+        sink.setnchannels(channels)
+        sink.setsampwidth(2)
+        sink.setframerate(sample_rate)
+        write = sink.writeframesraw
+        encoder = None
+    else:
+        cmd = ['ffmpeg', '-y', '-f', 's16le', '-ac', str(channels), '-ar', str(sample_rate),
+               '-i', '-', '-v', 'quiet', output_file]
+        encoder = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+        write = encoder.stdin.write
+
+    try:
+        for file in files:
+            decoder = subprocess.Popen(_decode_cmd(file, sample_rate, channels), stdout=subprocess.PIPE)
+            while True:
+                chunk = decoder.stdout.read(STREAM_CHUNK)
+                if not chunk:
+                    break
+                write(chunk)
+            decoder.stdout.close()
+            if decoder.wait() != 0:
+                raise RuntimeError(f"ffmpeg failed to decode {file}")
+    finally:
+        if encoder is None:
+            sink.close()
+        else:
+            encoder.stdin.close()
+            encoder.wait()
+
+    if encoder is not None and encoder.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to encode {output_file}")
@@ -0,0 +1,198 @@
+import wave
+from collections import namedtuple
+
+# Bitrates in kbps, indexed by [is_mpeg1][layer][bitrate_index]
+_BITRATES = {
+    True: {
+        1: [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+        2: [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+        3: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    },
+    False: {
+        1: [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+        2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+        3: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    },
+}
+
+# Sample rates indexed by version bits (0 = MPEG 2.5, 2 = MPEG 2, 3 = MPEG 1)
+_SAMPLE_RATES = {
+    0: [11025, 12000, 8000],
+    2: [22050, 24000, 16000],
+    3: [44100, 48000, 32000],
+}
+
+FrameHeader = namedtuple('FrameHeader', 'version layer bitrate sample_rate channels padding length samples')
+
+def parse_frame_header(data, offset=0):
+    """
+    Parses the 4-byte MPEG audio frame header at offset.
+    Returns a FrameHeader, or None if the bytes are not a valid header.
+    """
+    if offset + 4 > len(data):
+        return None
+    b0, b1, b2, b3 = data[offset], data[offset + 1], data[offset + 2], data[offset + 3]
+    if b0 != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+
+    version = (b1 >> 3) & 0x03
+    layer_bits = (b1 >> 1) & 0x03
+    bitrate_index = (b2 >> 4) & 0x0F
+    rate_index = (b2 >> 2) & 0x03
+    if version == 1 or layer_bits == 0 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    layer = 4 - layer_bits
+    is_mpeg1 = version == 3
+    bitrate = _BITRATES[is_mpeg1][layer][bitrate_index]
+    sample_rate = _SAMPLE_RATES[version][rate_index]
+    padding = (b2 >> 1) & 0x01
+    channels = 1 if (b3 >> 6) == 3 else 2
+
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate * 1000 // sample_rate + padding) * 4
+    else:
+        samples = 1152 if (layer == 2 or is_mpeg1) else 576
+        length = samples // 8 * bitrate * 1000 // sample_rate + padding
+
+    return FrameHeader(version, layer, bitrate, sample_rate, channels, padding, length, samples)
+
+def id3v2_size(data):
+    """Returns the size of a leading ID3v2 tag (0 if there is none)."""
+    if len(data) < 10 or data[:3] != b'ID3':
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+def _side_info_size(header):
+    if header.version == 3:
+        return 17 if header.channels == 1 else 32
+    return 9 if header.channels == 1 else 17
+
+def xing_frame_count(data, offset, header):
+    """
+    Returns the frame count stored in a Xing/Info or VBRI header inside the
+    frame at offset, or None if the frame carries no such header.
+    A frame with one of these headers holds no audio.
+    """
+    xing = offset + 4 + _side_info_size(header)
+    tag = data[xing:xing + 4]
+    if tag in (b'Xing', b'Info'):
+        flags = int.from_bytes(data[xing + 4:xing + 8], 'big')
+        if flags & 0x01:
+            return int.from_bytes(data[xing + 8:xing + 12], 'big')
+        return 0
+    vbri = offset + 4 + 32
+    if data[vbri:vbri + 4] == b'VBRI':
+        return int.from_bytes(data[vbri + 14:vbri + 18], 'big')
+    return None
+
+# LAME extension tags written after the Xing/Info header, by encoder string
+_LAME_ENCODERS = (b'LAME', b'Lavc', b'Lavf', b'L3.99')
+
+def lame_gapless(data, offset, header):
+    """
+    Returns (encoder_delay, padding) in samples from the LAME extension of
+    the Xing/Info header in the frame at offset, or (0, 0) if there is none.
+    Decoders drop these samples, so they are not part of the duration.
+    """
+    xing = offset + 4 + _side_info_size(header)
+    if data[xing:xing + 4] not in (b'Xing', b'Info'):
+        return 0, 0
+    flags = int.from_bytes(data[xing + 4:xing + 8], 'big')
+    lame = xing + 8
+    # Optional fields: frames, bytes, TOC, quality
+    for flag, size in ((0x01, 4), (0x02, 4), (0x04, 100), (0x08, 4)):
+        if flags & flag:
+            lame += size
+    if data[lame:lame + 4] not in _LAME_ENCODERS:
+        return 0, 0
+    # 12-bit delay and 12-bit padding follow the 21 bytes of encoder info
+    packed = data[lame + 21:lame + 24]
+    if len(packed) < 3:
+        return 0, 0
+    delay = (packed[0] << 4) | (packed[1] >> 4)
+    padding = ((packed[1] & 0x0F) << 8) | packed[2]
+    return delay, padding
+
+def iter_mp3_frames(data, max_sync=None):
+    """
+    Yields (offset, FrameHeader) for each audio frame in an MP3 byte string.
+    ID3 tags are skipped, and a frame is only accepted when the next one
+    follows it, so stray sync bytes inside tags or data are not picked up.
+    If max_sync is given, gives up when no frame starts within that many
+    bytes of the beginning (the data is probably not MP3 at all).
+    """
+    offset = id3v2_size(data)
+    end = len(data)
+    if data[-128:-125] == b'TAG':
+        end -= 128
+    sync_limit = offset + max_sync if max_sync is not None else end
+    found = False
+
+    while offset + 4 <= end:
+        if not found and offset > sync_limit:
+            return
+        header = parse_frame_header(data, offset)
+        if header is None or header.length <= 0:
+            offset += 1
+            continue
+        next_offset = offset + header.length
+        if next_offset + 4 <= end and parse_frame_header(data, next_offset) is None:
+            offset += 1
+            continue
+        if next_offset > end:
+            break
+        found = True
+        yield offset, header
+        offset = next_offset
+
+def probe_mp3_duration(data):
+    """
+    Returns the duration in seconds of MP3 bytes from their headers alone.
+    Uses the Xing/Info or VBRI frame count when present, otherwise scans
+    the frame headers. Encoder delay and padding recorded in a LAME tag are
+    left out, as decoders drop them. Returns None if no MPEG frames are found.
+    """
+    frames = iter_mp3_frames(data, max_sync=4096)
+    first = next(frames, None)
+    if first is None:
+        return None
+    offset, header = first
+
+    frame_count = xing_frame_count(data, offset, header)
+    delay, padding = lame_gapless(data, offset, header)
+    if frame_count:
+        samples = frame_count * header.samples - delay - padding
+        return max(samples, 0) / header.sample_rate
+
+    # No usable header: count samples frame by frame (the first frame is
+    # audio unless it is an empty Xing/Info frame)
+    samples = header.samples if frame_count is None else 0
+    for _, h in frames:
+        samples += h.samples
+    return max(samples - delay - padding, 0) / header.sample_rate
+
+def probe_wav_duration(path):
+    """Returns the duration in seconds from a WAV header, or None if unreadable."""
+    try:
+        with wave.open(path, 'rb') as w:
+            return w.getnframes() / w.getframerate()
+    except (wave.Error, EOFError):
+        return None
+
+def probe_duration(path):
+    """
+    Returns the duration of a WAV or MP3 file in seconds without decoding,
+    or None when the format is not recognised and a decode is needed.
+    """
+    with open(path, 'rb') as f:
+        head = f.read(12)
+    if head[:4] == b'RIFF' and head[8:12] == b'WAVE':
+        return probe_wav_duration(path)
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    return probe_mp3_duration(data)
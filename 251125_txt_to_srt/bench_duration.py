@@ -0,0 +1,65 @@
+import argparse
+import glob
+import os
+import random
+import shutil
+import tempfile
+import time
+from pydub import AudioSegment
+from audio_probe import probe_duration
+from audio_generator import decode_audio_duration
+
+def build_corpus(directory, count, seed=0):
+    """
+    Writes `count` MP3 clips of 1-8 seconds, similar to per-sentence TTS output.
+    """
+    rng = random.Random(seed)
+    files = []
+    for i in range(count):
+        path = os.path.join(directory, f"clip_{i}.mp3")
+        clip = AudioSegment.silent(duration=rng.randint(1000, 8000), frame_rate=24000)
+        clip.export(path, format="mp3", bitrate="32k")
+        files.append(path)
+    return files
+
+def time_it(func, files):
+    start = time.perf_counter()
+    results = [func(f) for f in files]
+    return time.perf_counter() - start, results
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare header probing against full decoding for clip durations.")
+    parser.add_argument("--corpus", help="Directory of existing .mp3/.wav clips. A synthetic corpus is generated if omitted.")
+    parser.add_argument("--count", type=int, default=1000, help="Number of clips in the synthetic corpus (default: 1000).")
+    args = parser.parse_args()
+
+    temp_dir = None
+    if args.corpus:
+        files = sorted(glob.glob(os.path.join(args.corpus, "*.mp3")) + glob.glob(os.path.join(args.corpus, "*.wav")))
+    else:
+        temp_dir = tempfile.mkdtemp()
+        print(f"Generating {args.count} clips in {temp_dir}...")
+        files = build_corpus(temp_dir, args.count)
+
+    if not files:
+        print("No clips found.")
+        return
+
+    try:
+        print(f"Timing {len(files)} clips...")
+        decode_time, decoded = time_it(decode_audio_duration, files)
+        probe_time, probed = time_it(probe_duration, files)
+
+        fallbacks = sum(1 for p in probed if p is None)
+        errors = [abs(p - d) for p, d in zip(probed, decoded) if p is not None]
+        max_error = max(errors) * 1000 if errors else 0.0
+
+        print(f"decode: {decode_time:.3f}s ({decode_time / len(files) * 1000:.2f} ms/clip)")
+        print(f"probe:  {probe_time:.3f}s ({probe_time / len(files) * 1000:.3f} ms/clip)")
+        print(f"speedup: {decode_time / probe_time:.1f}x, fallbacks: {fallbacks}, max difference: {max_error:.1f} ms")
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import argparse
+import datetime
+import os
+import shutil
+import tempfile
+import time
+from subtitle_writer import write_subtitles
+
+def legacy_format_time(seconds):
+    # The timedelta-based formatter srt_generator used before subtitle_writer
+    td = datetime.timedelta(seconds=seconds)
+    total_seconds = int(td.total_seconds())
+    hours = total_seconds // 3600
+    minutes = (total_seconds % 3600) // 60
+    secs = total_seconds % 60
+    millis = int(td.microseconds / 1000)
+    return f"{hours:02}:{minutes:02}:{secs:02},{millis:03}"
+
+def legacy_generate_srt(subtitles, output_file):
+    with open(output_file, 'w', encoding='utf-8') as f:
+        for i, sub in enumerate(subtitles, 1):
+            f.write(f"{i}\n")
+            f.write(f"{legacy_format_time(sub['start_time'])} --> {legacy_format_time(sub['end_time'])}\n")
+            f.write(f"{sub['text']}\n\n")
+
+def make_cues(count):
+    cues = []
+    start = 0
+    for i in range(count):
+        end = start + 1500 + (i * 37) % 3000
+        cues.append((start, end, f"Subtitle line number {i} with some text"))
+        start = end + 40
+    return cues
+
+def report(name, seconds, count, path):
+    size = os.path.getsize(path) / (1024 * 1024)
+    print(f"{name:<8} {seconds:7.3f}s  {count / seconds / 1000:8.1f}k cues/s  {size / seconds:7.1f} MB/s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure subtitle writer throughput.")
+    parser.add_argument("--count", type=int, default=1000000, help="Number of cues (default: 1000000).")
+    args = parser.parse_args()
+
+    cues = make_cues(args.count)
+    legacy = [{'start_time': s / 1000.0, 'end_time': e / 1000.0, 'text': t} for s, e, t in cues]
+    temp_dir = tempfile.mkdtemp()
+
+    try:
+        path = os.path.join(temp_dir, "legacy.srt")
+        start = time.perf_counter()
+        legacy_generate_srt(legacy, path)
+        report("legacy", time.perf_counter() - start, args.count, path)
+
+        for fmt in ("srt", "vtt", "ass"):
+            path = os.path.join(temp_dir, f"out.{fmt}")
+            start = time.perf_counter()
+            write_subtitles(cues, path)
+            report(fmt, time.perf_counter() - start, args.count, path)
+    finally:
+        shutil.rmtree(temp_dir)
+
+if __name__ == "__main__":
+    main()
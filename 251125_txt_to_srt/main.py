@@ -2,72 +2,128 @@ import argparse
 import os
 import shutil
 import tempfile
-from text_processor import split_sentences, split_subtitle
-from audio_generator import generate_audio, get_audio_duration, concatenate_audio
+from text_processor import iter_sentences, split_subtitle
+from audio_generator import get_engine, concatenate_audio, ClipList, ENGINES, CONCAT_MODES
 from srt_generator import generate_srt
+from subtitle_writer import format_from_path
+from synthesis_pipeline import synthesize_sentences
+from tts_cache import TTSCache, DEFAULT_CACHE_DIR
+from manifest import SentenceManifest
+import alignment
+
+def build_subtitles(results, audio_files, max_chars, align=False, **split_options):
+    """
+    Yields subtitle entries in timeline order from the synthesis results,
+    appending the clip paths to audio_files (a list or ClipList) along the way.
+    split_options are passed on to split_subtitle. With align, split points
+    are snapped to pauses in each clip.
+    """
+    current_time = 0.0
+    for i, sentence, audio_path, duration in results:
+        print(f"Processing sentence {i+1}...")
+        audio_files.append(audio_path)
+        
+        # Split subtitle if needed
+        segments = split_subtitle(sentence, max_chars, duration, **split_options)
+        if align and len(segments) > 1:
+            segments = alignment.align_segments(audio_path, segments, duration)
+        
+        for segment in segments:
+            yield {
+                'text': segment['text'],
+                'start_time': current_time,
+                'end_time': current_time + segment['duration']
+            }
+            current_time += segment['duration']
 
 def main():
     parser = argparse.ArgumentParser(description="Convert text file to audio and SRT.")
     parser.add_argument("input_file", help="Path to the input text file.")
     parser.add_argument("--output_audio", help="Path to the output audio file.", default="output.mp3")
-    parser.add_argument("--output_srt", help="Path to the output SRT file.", default="output.srt")
-    parser.add_argument("--max_chars", type=int, default=80, help="Maximum characters per subtitle segment.")
+    parser.add_argument("--output_srt", help="Path to the output subtitle file; .vtt and .ass write WebVTT and ASS.", default="output.srt")
+    parser.add_argument("--max_chars", type=int, default=80, help="Maximum characters per subtitle line.")
+    parser.add_argument("--max_lines", type=int, default=1, help="Maximum lines per subtitle segment (default: 1).")
+    parser.add_argument("--max_cps", type=float, help="Reading speed limit in characters per second; segments too short to read are avoided.")
+    parser.add_argument("--align", action="store_true", help="Snap split subtitle boundaries to pauses in the speech (requires numpy).")
     parser.add_argument("--lang", default="en", help="Language code for speech generation (default: en).")
+    parser.add_argument("--engine", default="gtts", choices=sorted(ENGINES), help="Speech engine (default: gtts). 'fake' writes silent clips offline.")
+    parser.add_argument("--workers", type=int, default=4, help="Number of sentences synthesized in parallel (default: 4).")
+    parser.add_argument("--retries", type=int, default=3, help="Retries per sentence when synthesis fails (default: 3).")
+    parser.add_argument("--backoff", type=float, default=1.0, help="Initial retry delay in seconds, doubled on each retry (default: 1.0).")
+    parser.add_argument("--cache_dir", default=DEFAULT_CACHE_DIR, help=f"Directory of the shared TTS cache (default: {DEFAULT_CACHE_DIR}).")
+    parser.add_argument("--no_cache", action="store_true", help="Always synthesize, ignoring the TTS cache.")
+    parser.add_argument("--workdir", help="Keep sentence clips and a manifest in this directory; later runs only synthesize changed sentences.")
+    parser.add_argument("--concat_mode", default="stream", choices=CONCAT_MODES, help="How clips are joined: stream PCM through one encoder, copy MP3 frames (faster, but leaves small gaps between clips), or decode in memory (default: stream).")
     
     args = parser.parse_args()
     
     if not os.path.exists(args.input_file):
         print(f"Error: Input file '{args.input_file}' not found.")
         return
+    
+    if args.align and alignment.np is None:
+        print("Error: --align requires numpy (pip install numpy).")
+        return
 
-    print(f"Reading input file: {args.input_file}")
-    with open(args.input_file, 'r', encoding='utf-8') as f:
-        text = f.read()
-        
-    sentences = split_sentences(text)
-    print(f"Found {len(sentences)} sentences.")
+    if args.workdir:
+        # Incremental mode: clips and manifest survive between runs
+        work_dir = args.workdir
+        os.makedirs(work_dir, exist_ok=True)
+        manifest = SentenceManifest(work_dir)
+        print(f"Using work directory: {work_dir} ({len(manifest.previous)} sentences in manifest)")
+    else:
+        work_dir = tempfile.mkdtemp()
+        manifest = None
+        print(f"Created temporary directory: {work_dir}")
     
-    temp_dir = tempfile.mkdtemp()
-    print(f"Created temporary directory: {temp_dir}")
+    # Clip paths go to a temp file, not memory
+    audio_files = ClipList(work_dir)
     
-    audio_files = []
-    subtitles = []
-    current_time = 0.0
+    engine = get_engine(args.engine)
+    cache = None if args.no_cache else TTSCache(args.cache_dir)
+    
+    print(f"Reading input file: {args.input_file}")
+    input_stream = open(args.input_file, 'r', encoding='utf-8')
     
     try:
-        for i, sentence in enumerate(sentences):
-            print(f"Processing sentence {i+1}/{len(sentences)}...")
-            
-            # Generate audio for the sentence
-            temp_audio_path = os.path.join(temp_dir, f"sentence_{i}.mp3")
-            generate_audio(sentence, temp_audio_path, lang=args.lang)
-            audio_files.append(temp_audio_path)
-            
-            # Get duration
-            duration = get_audio_duration(temp_audio_path)
-            
-            # Split subtitle if needed
-            segments = split_subtitle(sentence, args.max_chars, duration)
-            
-            for segment in segments:
-                subtitles.append({
-                    'text': segment['text'],
-                    'start_time': current_time,
-                    'end_time': current_time + segment['duration']
-                })
-                current_time += segment['duration']
-                
+        # The input is read and split lazily, so synthesis starts on the first
+        # sentences right away. They are synthesized in parallel but arrive
+        # here in order, and the SRT is written as the timeline is built.
+        sentences = iter_sentences(input_stream)
+        results = synthesize_sentences(sentences, engine, work_dir, lang=args.lang,
+                                       workers=args.workers, retries=args.retries, backoff=args.backoff,
+                                       cache=cache, manifest=manifest)
+        subtitles = build_subtitles(results, audio_files, args.max_chars,
+                                    align=args.align, max_lines=args.max_lines, max_cps=args.max_cps)
+        # Written next to the output and moved over it only once complete,
+        # so a failed run leaves the previous subtitles in place
+        srt_tmp = args.output_srt + '.tmp'
+        try:
+            generate_srt(subtitles, srt_tmp, fmt=format_from_path(args.output_srt))
+        except BaseException:
+            if os.path.exists(srt_tmp):
+                os.remove(srt_tmp)
+            raise
+        os.replace(srt_tmp, args.output_srt)
+        print(f"Processed {len(audio_files)} sentences.")
+        print(f"SRT saved to: {args.output_srt}")
+        
         print("Concatenating audio files...")
-        concatenate_audio(audio_files, args.output_audio)
+        concatenate_audio(audio_files, args.output_audio, mode=args.concat_mode)
         print(f"Audio saved to: {args.output_audio}")
         
-        print("Generating SRT file...")
-        generate_srt(subtitles, args.output_srt)
-        print(f"SRT saved to: {args.output_srt}")
+        if manifest:
+            removed = manifest.save()
+            print(f"Reused {manifest.reused} clips from the previous run, removed {removed} stale clips.")
         
     finally:
-        print("Cleaning up temporary files...")
-        shutil.rmtree(temp_dir)
+        input_stream.close()
+        audio_files.close()
+        if manifest:
+            manifest.close() # No-op once saved
+        if not args.workdir:
+            print("Cleaning up temporary files...")
+            shutil.rmtree(work_dir)
         print("Done.")
 
 if __name__ == "__main__":
@@ -0,0 +1,104 @@
+import glob
+import json
+import os
+import tempfile
+
+MANIFEST_NAME = 'manifest.json'
+PARTIAL_NAME = 'manifest.partial'
+CLIP_PREFIX = 'clip_'
+
+class SentenceManifest:
+    """
+    Records sentence -> audio clip -> duration for an incremental work directory.
+
+    Clips are named after the sentence's cache key, so a sentence whose text,
+    language and engine did not change since the previous run is found again
+    by lookup() and does not need to be synthesized.
+
+    Sentences of the current run are appended to a partial file as they
+    are recorded, so memory use does not grow with the input.
+    """
+    def __init__(self, workdir):
+        self.workdir = workdir
+        self.path = os.path.join(workdir, MANIFEST_NAME)
+        self.previous = self._load()
+        self.partial_path = os.path.join(workdir, PARTIAL_NAME)
+        self._partial = open(self.partial_path, 'w', encoding='utf-8')
+        self.recorded = 0
+        self.reused = 0
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # Only what lookup() needs; the texts are not kept
+        return {e['key']: (e['clip'], e['duration']) for e in data.get('sentences', [])}
+
+    def clip_path(self, key, extension):
+        return os.path.join(self.workdir, f"{CLIP_PREFIX}{key}.{extension}")
+
+    def lookup(self, key):
+        """
+        Returns (clip_path, duration) from the previous run, or None if the
+        sentence is new or its clip is gone.
+        """
+        entry = self.previous.get(key)
+        if entry is None:
+            return None
+        clip, duration = entry
+        path = os.path.join(self.workdir, clip)
+        if not os.path.exists(path):
+            return None
+        self.reused += 1
+        return path, duration
+
+    def record(self, key, text, clip_path, duration):
+        """Appends a sentence of the current run, in timeline order."""
+        entry = {
+            'key': key,
+            'text': text,
+            'clip': os.path.basename(clip_path),
+            'duration': duration,
+        }
+        self._partial.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self.recorded += 1
+
+    def _entries(self):
+        with open(self.partial_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                yield json.loads(line)
+
+    def close(self):
+        """Discards the current run without touching the saved manifest."""
+        if not self._partial.closed:
+            self._partial.close()
+            os.remove(self.partial_path)
+
+    def save(self):
+        """
+        Writes the manifest of the current run and deletes clips that are no
+        longer referenced by it.
+        """
+        self._partial.close()
+        in_use = set()
+        fd, tmp_path = tempfile.mkstemp(dir=self.workdir, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            # Same layout as json.dump of the whole manifest, one entry at a time
+            f.write('{"version": 1, "sentences": [')
+            for i, entry in enumerate(self._entries()):
+                if i:
+                    f.write(', ')
+                f.write(json.dumps(entry, ensure_ascii=False))
+                in_use.add(entry['clip'])
+            f.write(']}')
+        os.replace(tmp_path, self.path)
+        os.remove(self.partial_path)
+
+        removed = 0
+        for path in glob.glob(os.path.join(self.workdir, CLIP_PREFIX + '*')):
+            if os.path.basename(path) not in in_use:
+                os.remove(path)
+                removed += 1
+        return removed
@@ -0,0 +1,113 @@
+import os
+import shutil
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from audio_generator import get_audio_duration
+from tts_cache import cache_key
+
+def synthesize_with_retry(engine, text, output_file, lang='en', retries=3, backoff=1.0):
+    """
+    Calls engine.synthesize, retrying with exponential backoff on failure.
+    The last error is re-raised once all retries are used up.
+    """
+    attempt = 0
+    while True:
+        try:
+            engine.synthesize(text, output_file, lang=lang)
+            return
+        except Exception as e:
+            if attempt >= retries:
+                raise
+            delay = backoff * (2 ** attempt)
+            print(f"Synthesis failed ({e}), retrying in {delay:.1f}s...")
+            time.sleep(delay)
+            attempt += 1
+
+def _synthesize_one(engine, sentence, key, output_file, lang, retries, backoff, cache):
+    entry = cache.get(key) if cache else None
+    if entry:
+        shutil.copyfile(entry['path'], output_file)
+        duration = entry['duration']
+        if duration is None:
+            duration = get_audio_duration(output_file)
+        return output_file, duration
+
+    synthesize_with_retry(engine, sentence, output_file, lang=lang, retries=retries, backoff=backoff)
+    duration = get_audio_duration(output_file)
+    if cache:
+        cache.put(key, output_file, duration=duration)
+    return output_file, duration
+
+def _done(result):
+    future = Future()
+    future.set_result(result)
+    return future
+
+def synthesize_sentences(sentences, engine, output_dir, lang='en', workers=4, retries=3, backoff=1.0,
+                         cache=None, manifest=None):
+    """
+    Synthesizes sentences on a pool of worker threads.
+
+    Sentences are rendered out of order, but results are yielded in input
+    order so the caller can build the subtitle timeline as they arrive.
+    At most 2 * workers sentences are in flight, so `sentences` may be a
+    lazy iterable. When a TTSCache is given, sentences already in the cache
+    are copied from it instead of being synthesized again.
+
+    With a SentenceManifest, clips are stored in the manifest's work
+    directory under their cache key: clips from the previous run are reused
+    as they are, repeated sentences in flight together are rendered once
+    (later repeats come from the TTS cache), and every result is recorded
+    in the manifest.
+
+    Yields:
+        tuple: (index, sentence, audio_path, duration)
+    """
+    window = max(1, workers) * 2
+    pending = deque()
+    by_key = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        def submit(sentence, key, output_file):
+            return pool.submit(_synthesize_one, engine, sentence, key, output_file,
+                               lang, retries, backoff, cache)
+
+        def finish(item):
+            index, sentence, key, future = item
+            audio_path, duration = future.result()
+            if manifest is not None:
+                manifest.record(key, sentence, audio_path, duration)
+                # Only in-flight sentences are kept for deduplication
+                if by_key.get(key) is future and not any(p[2] == key for p in pending):
+                    del by_key[key]
+            return index, sentence, audio_path, duration
+
+        try:
+            for index, sentence in enumerate(sentences):
+                key = cache_key(sentence, lang, engine.name, engine.voice)
+                if manifest is None:
+                    output_file = os.path.join(output_dir, f"sentence_{index}.{engine.extension}")
+                    future = submit(sentence, key, output_file)
+                else:
+                    future = by_key.get(key)
+                    if future is None:
+                        previous = manifest.lookup(key)
+                        if previous:
+                            future = _done(previous)
+                        else:
+                            future = submit(sentence, key, manifest.clip_path(key, engine.extension))
+                        by_key[key] = future
+
+                pending.append((index, sentence, key, future))
+                if len(pending) >= window:
+                    yield finish(pending.popleft())
+
+            while pending:
+                yield finish(pending.popleft())
+        finally:
+            # Drop queued work if the caller stopped early or a sentence failed
+            for item in pending:
+                item[3].cancel()
+            if cache:
+                cache.flush()
@@ -0,0 +1,69 @@
+import math
+import os
+import shutil
+import struct
+import subprocess
+import tempfile
+import unittest
+import wave
+from audio_probe import probe_duration, probe_mp3_duration
+
+# MPEG 2 layer III, 32 kbps, 24 kHz, mono: 576 samples in 96 bytes
+FRAME_HEADER = bytes([0xFF, 0xF3, 0x44, 0xC0])
+FRAME_LENGTH = 96
+FRAME_SAMPLES = 576
+SAMPLE_RATE = 24000
+
+def info_frame(frame_count, delay, padding):
+    """Builds an Info frame with a frame count and a LAME delay/padding field."""
+    lame = b'LAME3.100' + bytes(12)
+    lame += bytes([delay >> 4, ((delay & 0x0F) << 4) | (padding >> 8), padding & 0xFF])
+    body = bytes(9) + b'Info' + struct.pack('>II', 0x01, frame_count) + lame
+    return (FRAME_HEADER + body).ljust(FRAME_LENGTH, b'\0')
+
+def audio_frame():
+    return FRAME_HEADER.ljust(FRAME_LENGTH, b'\x55')
+
+class LameGaplessTest(unittest.TestCase):
+    def test_delay_and_padding_are_subtracted(self):
+        frames = 50
+        data = info_frame(frames, 576 + 529, 700) + audio_frame() * frames
+        expected = (frames * FRAME_SAMPLES - 576 - 529 - 700) / SAMPLE_RATE
+        self.assertAlmostEqual(probe_mp3_duration(data), expected)
+
+    def test_info_frame_without_lame_tag(self):
+        frames = 50
+        data = info_frame(frames, 0, 0)[:4 + 9 + 12].ljust(FRAME_LENGTH, b'\0') + audio_frame() * frames
+        self.assertAlmostEqual(probe_mp3_duration(data), frames * FRAME_SAMPLES / SAMPLE_RATE)
+
+@unittest.skipUnless(shutil.which('ffmpeg'), "ffmpeg is not installed")
+class DecodedDurationTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def decoded_samples(self, path):
+        pcm = subprocess.run(['ffmpeg', '-i', path, '-f', 's16le', '-ac', '1', '-v', 'quiet', '-'],
+                             stdout=subprocess.PIPE, check=True).stdout
+        return len(pcm) // 2
+
+    def test_matches_decoded_duration(self):
+        # Clip lengths similar to per-sentence TTS output
+        for samples in (SAMPLE_RATE // 2, 37 * SAMPLE_RATE // 10, 8 * SAMPLE_RATE + 123):
+            wav_path = os.path.join(self.temp_dir, f"{samples}.wav")
+            mp3_path = os.path.join(self.temp_dir, f"{samples}.mp3")
+            with wave.open(wav_path, 'wb') as w:
+                w.setnchannels(1)
+                w.setsampwidth(2)
+                w.setframerate(SAMPLE_RATE)
+                w.writeframes(b''.join(struct.pack('<h', int(8000 * math.sin(i / 10)))
+                                       for i in range(samples)))
+            subprocess.run(['ffmpeg', '-y', '-i', wav_path, '-b:a', '32k', '-v', 'quiet', mp3_path], check=True)
+
+            decoded = self.decoded_samples(mp3_path) / SAMPLE_RATE
+            self.assertAlmostEqual(probe_duration(mp3_path), decoded, delta=0.001)
+
+if __name__ == '__main__':
+    unittest.main()
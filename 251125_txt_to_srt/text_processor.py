@@ -1,5 +1,18 @@
 import re
 
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+
+def split_line(line):
+    """
+    Splits a single line into sentences on ., ! or ? followed by whitespace.
+    """
+    # This regex looks for (. or ! or ?) followed by a space or end of string
+    # We keep the punctuation with the sentence
+    for part in SENTENCE_BOUNDARY.split(line):
+        clean_part = part.strip()
+        if clean_part:
+            yield clean_part
+
 def split_sentences(text):
     """
     Splits text into sentences using regex.
@@ -13,54 +26,179 @@ def split_sentences(text):
     for line in lines:
         if not line.strip():
             continue
-            
-        # Split by punctuation followed by space or end of string
-        # This regex looks for (. or ! or ?) followed by a space or end of string
-        # We keep the punctuation with the sentence
-        parts = re.split(r'(?<=[.!?])\s+', line)
-        for part in parts:
-            clean_part = part.strip()
-            if clean_part:
-                final_sentences.append(clean_part)
+        final_sentences.extend(split_line(line))
                 
     return final_sentences
 
-def split_subtitle(text, max_chars, duration):
+def iter_sentences(f, chunk_size=64 * 1024, max_pending=20000):
+    """
+    Lazily yields the same sentences as split_sentences, reading the text
+    file object f in chunks.
+
+    Complete lines are split as usual. For a line that spans chunks, the
+    sentences before its last boundary are yielded and only the tail is
+    carried over. If the tail grows past max_pending characters without a
+    boundary, it is cut at the last space, so memory stays bounded for any
+    input size.
+    """
+    carry = ''
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        lines = (carry + chunk).split('\n')
+        carry = lines.pop()
+        for line in lines:
+            yield from split_line(line)
+
+        last = None
+        for last in SENTENCE_BOUNDARY.finditer(carry):
+            pass
+        if last is not None:
+            yield from split_line(carry[:last.start()])
+            carry = carry[last.end():]
+
+        if len(carry) > max_pending:
+            cut = carry.rfind(' ', 0, max_pending)
+            if cut <= 0:
+                cut = max_pending
+            yield from split_line(carry[:cut])
+            carry = carry[cut:]
+
+    yield from split_line(carry)
+
+BREAK_PUNCTUATION = ',;:.!?'
+
+def _reading_cost(chars, total_chars, duration, max_cps, min_duration, weight):
+    """
+    Penalty for a cue that is shown for less time than it takes to read.
+    The shortfall is measured in characters at max_cps and squared.
+    """
+    if not max_cps or not total_chars:
+        return 0.0
+    shown = chars / total_chars * duration
+    needed = max(min_duration, chars / max_cps)
+    if shown >= needed:
+        return 0.0
+    return weight * ((needed - shown) * max_cps) ** 2
+
+def break_lines(words, max_chars, line_penalty, punctuation_bonus, cue_cost):
+    """
+    Chooses line breaks with minimum total raggedness (Knuth-Plass style).
+
+    Every line costs (max_chars - width)^2 + line_penalty + cue_cost(width),
+    minus punctuation_bonus when it ends after punctuation (except at the end
+    of the sentence). Only lines that fit in max_chars are considered (a
+    single longer word gets a line of its own), so the search is
+    O(words * max_chars) rather than quadratic.
+
+    Returns:
+        list of str: The lines.
+    """
+    n = len(words)
+    best = [0.0] + [float('inf')] * n
+    prev = [0] * (n + 1)
+
+    for j in range(1, n + 1):
+        bonus = punctuation_bonus if j < n and words[j - 1][-1] in BREAK_PUNCTUATION else 0
+        width = -1
+        for i in range(j - 1, -1, -1):
+            width += len(words[i]) + 1
+            if width > max_chars and i < j - 1:
+                break
+            cost = best[i] + (max_chars - width) ** 2 + line_penalty - bonus + cue_cost(width)
+            if cost < best[j]:
+                best[j] = cost
+                prev[j] = i
+
+    lines = []
+    j = n
+    while j > 0:
+        i = prev[j]
+        lines.append(" ".join(words[i:j]))
+        j = i
+    lines.reverse()
+    return lines
+
+def group_lines(lines, max_lines, cue_penalty, cue_cost):
+    """
+    Groups consecutive lines into cues of at most max_lines lines,
+    preferring fewer cues and cues that can be read in time.
+
+    Returns:
+        list of list of str: The lines of each cue.
+    """
+    n = len(lines)
+    best = [0.0] + [float('inf')] * n
+    prev = [0] * (n + 1)
+
+    for j in range(1, n + 1):
+        chars = -1
+        for i in range(j - 1, max(-1, j - 1 - max_lines), -1):
+            chars += len(lines[i]) + 1
+            cost = best[i] + cue_penalty + cue_cost(chars)
+            if cost < best[j]:
+                best[j] = cost
+                prev[j] = i
+
+    cues = []
+    j = n
+    while j > 0:
+        cues.append(lines[prev[j]:j])
+        j = prev[j]
+    cues.reverse()
+    return cues
+
+def split_subtitle(text, max_chars, duration, max_lines=1, max_cps=None, min_duration=1.0,
+                   line_penalty=None, punctuation_bonus=None, reading_weight=1.0):
     """
     Splits a sentence into segments if it exceeds max_chars.
+    Line breaks are chosen by break_lines to keep segments balanced, and
+    lines are then grouped into cues of up to max_lines lines.
     Duration is distributed proportionally based on character count.
     
     Args:
         text (str): The sentence text.
-        max_chars (int): Maximum characters per segment.
+        max_chars (int): Maximum characters per line.
         duration (float): Total duration of the sentence audio.
+        max_lines (int): Maximum lines per segment; lines are joined with a newline.
+        max_cps (float): Reading speed limit in characters per second. Segments
+            shown for less than max(min_duration, chars / max_cps) are penalized.
+        min_duration (float): Shortest comfortable display time, used with max_cps.
+        line_penalty (float): Cost of each extra line (default: max_chars^2 / 4).
+        punctuation_bonus (float): Reward for breaking after punctuation
+            (default: max_chars^2 / 16).
+        reading_weight (float): Weight of the reading speed penalty.
         
     Returns:
-        list of dict: Each dict contains 'text', 'start_ratio', 'end_ratio', 'duration'
+        list of dict: Each dict contains 'text', 'duration'
     """
+    # Fast path: the common short sentence needs no breaking at all
     if len(text) <= max_chars:
         return [{'text': text, 'duration': duration}]
     
     words = text.split()
-    segments = []
-    current_segment = []
-    current_length = 0
+    if line_penalty is None:
+        line_penalty = max_chars * max_chars / 4
+    if punctuation_bonus is None:
+        punctuation_bonus = max_chars * max_chars / 16
+    
+    total_chars = len(" ".join(words))
+    def cue_cost(chars):
+        return _reading_cost(chars, total_chars, duration, max_cps, min_duration, reading_weight)
+    
+    # With several lines per cue, reading speed is judged per cue instead of per line
+    line_cost = cue_cost if max_lines <= 1 else (lambda chars: 0.0)
+    lines = break_lines(words, max_chars, line_penalty, punctuation_bonus, line_cost)
     
-    for word in words:
-        if current_length + len(word) + (1 if current_segment else 0) <= max_chars:
-            current_segment.append(word)
-            current_length += len(word) + (1 if len(current_segment) > 1 else 0)
-        else:
-            segments.append(" ".join(current_segment))
-            current_segment = [word]
-            current_length = len(word)
-            
-    if current_segment:
-        segments.append(" ".join(current_segment))
+    if max_lines <= 1:
+        segments = lines
+    else:
+        cues = group_lines(lines, max_lines, line_penalty * 4, cue_cost)
+        segments = ["\n".join(cue) for cue in cues]
         
     # Calculate durations
-    total_chars = len(text) # Approximation using original text length (including spaces)
-    # Better to use sum of segment lengths to avoid mismatch if spaces differ
+    # Use the sum of segment lengths to avoid mismatch if spaces differ
     total_segment_chars = sum(len(s) for s in segments)
     
     result = []
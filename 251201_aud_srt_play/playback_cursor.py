@@ -0,0 +1,51 @@
+from bisect import bisect_right
+
+class PlaybackCursor:
+    """
+    Tracks the active cue (the last one whose start is <= the playback time)
+    over a sorted array of start times.
+
+    During playback the answer moves by zero or one cue per tick, so the
+    cursor steps from where it was. After a seek it gallops from the old
+    position (1, 2, 4, ... cues) until it brackets the time, then bisects
+    inside the bracket, so a jump of k cues costs O(log k).
+    """
+    def __init__(self, starts=()):
+        self.reset(starts)
+
+    def reset(self, starts):
+        self.starts = starts
+        self.index = -1
+
+    def seek(self, time_ms):
+        """Moves to time_ms and returns the active index (-1 before the first cue)."""
+        starts = self.starts
+        count = len(starts)
+        i = self.index
+
+        if i + 1 < count and starts[i + 1] <= time_ms:
+            # Forward; usually just the next cue
+            lo = i + 1
+            if lo + 1 >= count or starts[lo + 1] > time_ms:
+                self.index = lo
+                return lo
+            step = 1
+            hi = lo + step
+            while hi < count and starts[hi] <= time_ms:
+                lo = hi
+                step *= 2
+                hi = lo + step
+            # starts[lo] <= time_ms < starts[hi] (or hi past the end)
+            self.index = bisect_right(starts, time_ms, lo, min(hi, count)) - 1
+        elif i >= 0 and starts[i] > time_ms:
+            # Backward seek
+            hi = i
+            step = 1
+            lo = hi - step
+            while lo >= 0 and starts[lo] > time_ms:
+                hi = lo
+                step *= 2
+                lo = hi - step
+            # starts[lo] <= time_ms < starts[hi] (or lo before the start)
+            self.index = bisect_right(starts, time_ms, max(lo, 0), hi) - 1
+        return self.index
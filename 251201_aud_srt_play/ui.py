@@ -1,9 +1,16 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
-import pysubs2
+from cue_timeline import CueTimeline
+from playback_cursor import PlaybackCursor
 from player import AudioPlayer
 from utils import ms_to_timestamp, timestamp_to_ms
 
+# (font, colour) of the centered subtitle and of the lines around it
+ACTIVE_STYLE = (("Arial", 16, "bold"), "yellow")
+NORMAL_STYLE = (("Arial", 12, "bold"), "white")
+# Wrap width of subtitle lines, in pixels
+TEXT_WIDTH = 350
+
 class PlayerUI:
     def __init__(self, root):
         self.root = root
@@ -11,8 +18,15 @@ class PlayerUI:
         self.root.geometry("400x900")
         
         self.player = AudioPlayer()
-        self.subs = []
+        self.subs = CueTimeline()
+        self.cursor = PlaybackCursor(self.subs.starts)
         self.current_sub_index = -1
+        self.time_text = None
+        
+        # Retained canvas items: subtitle index -> (item, style), plus hidden spares
+        self.items = {}
+        self.spare_items = []
+        self.text_heights = {}
         
         # UI Elements
         self.setup_ui()
@@ -35,6 +49,9 @@ class PlayerUI:
         # Canvas for Subtitles
         self.canvas = tk.Canvas(self.root, bg="black", highlightthickness=0)
         self.canvas.pack(fill=tk.BOTH, expand=True)
+        self.canvas.bind('<Configure>', lambda event: self.layout(self.current_sub_index))
+        # Off-screen item used only to measure wrapped text heights
+        self.measure_item = self.canvas.create_text(-10000, -10000, width=TEXT_WIDTH, justify=tk.CENTER, anchor="nw")
         
         # Bottom Frame for Controls
         control_frame = tk.Frame(self.root, bg="#444", height=100)
@@ -74,7 +91,10 @@ class PlayerUI:
         
         try:
             self.player.load(audio_file)
-            self.subs = pysubs2.load(srt_file)
+            self.subs = CueTimeline.load_srt(srt_file)
+            self.cursor.reset(self.subs.starts)
+            self.clear_items()
+            self.update_display(0, force=True)
             messagebox.showinfo("Success", "Files loaded successfully!")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load files: {e}")
@@ -119,102 +139,106 @@ class PlayerUI:
             
         self.root.after(self.update_interval, self.update_loop)
 
-    def update_display(self, current_ms):
-        # Update Time Label
-        self.time_label.config(text=ms_to_timestamp(current_ms))
+    def update_display(self, current_ms, force=False):
+        # Update Time Label (only when the shown second changes)
+        time_text = ms_to_timestamp(current_ms)
+        if time_text != self.time_text:
+            self.time_text = time_text
+            self.time_label.config(text=time_text)
         
         # Find active subtitle (the one that should be centered)
         # "When a subtitle's start time matches the audio playback time, that specific subtitle must always be positioned in the center"
-        # We'll select the subtitle with the largest start_time <= current_ms
-        
-        target_idx = -1
-        for i, sub in enumerate(self.subs):
-            if sub.start <= current_ms:
-                target_idx = i
-            else:
-                break
-        
-        self.canvas.delete("all")
-        center_y = self.canvas.winfo_height() / 2
+        # The cursor selects the subtitle with the largest start_time <= current_ms
+        target_idx = self.cursor.seek(current_ms)
+        
+        # The layout only depends on the active subtitle
+        if target_idx == self.current_sub_index and not force:
+            return
+        self.current_sub_index = target_idx
+        self.layout(target_idx)
+
+    def layout(self, target_idx):
+        width = self.canvas.winfo_width()
+        height = self.canvas.winfo_height()
+        center_y = height / 2
         
-        # If no subtitle has started yet, maybe show the first one below center?
-        # Or just show nothing centered.
-        # Let's assume if target_idx is -1, we just draw from 0 downwards starting below center?
-        # Or maybe we just don't draw anything centered.
+        # (index, top y, style) of every line in view
+        placed = []
         
-        # Draw centered subtitle
         if target_idx != -1:
-            bbox = self.draw_subtitle(target_idx, center_y, anchor="center")
+            # Draw centered subtitle
+            active_height = self.text_height(target_idx, ACTIVE_STYLE)
+            top_y = center_y - active_height / 2
+            placed.append((target_idx, top_y, ACTIVE_STYLE))
             
-            # Draw previous subtitles (going up)
-            if bbox:
-                # Start just above the centered text
-                # bbox is (x1, y1, x2, y2)
-                # y1 is top, y2 is bottom
-                current_bottom_y = bbox[1] - 10 # 10px padding
-                
-                for i in range(target_idx - 1, -1, -1):
-                    if current_bottom_y < 0:
-                        break
-                    # We draw with anchor="s" (south/bottom) so we can place it at current_bottom_y
-                    bbox_prev = self.draw_subtitle(i, current_bottom_y, anchor="s")
-                    if bbox_prev:
-                        current_bottom_y = bbox_prev[1] - 10
-
-            # Draw next subtitles (going down)
-            if bbox:
-                current_top_y = bbox[3] + 10 # 10px padding
-                
-                for i in range(target_idx + 1, len(self.subs)):
-                    if current_top_y > self.canvas.winfo_height():
-                        break
-                    bbox_next = self.draw_subtitle(i, current_top_y, anchor="n")
-                    if bbox_next:
-                        current_top_y = bbox_next[3] + 10
-        else:
-            # No subtitle started yet. Draw all from index 0 starting somewhat below center?
-            # Or just wait.
-            # Let's draw index 0 at center + offset?
-            # User said "pulling the upcoming lines up from the bottom".
-            # If nothing started, maybe they are all below?
-            # Let's just draw starting from 0 at center + some offset?
-            # Or just leave blank until first one starts.
-            # Let's try drawing index 0 slightly below center to indicate it's coming.
-            
-            current_top_y = center_y + 50
-            for i in range(0, len(self.subs)):
-                if current_top_y > self.canvas.winfo_height():
+            # Previous subtitles (going up), 10px apart
+            current_bottom_y = top_y - 10
+            for i in range(target_idx - 1, -1, -1):
+                if current_bottom_y < 0:
                     break
-                bbox_next = self.draw_subtitle(i, current_top_y, anchor="n")
-                if bbox_next:
-                    current_top_y = bbox_next[3] + 10
-
-    def draw_subtitle(self, index, y_pos, anchor="center"):
-        text = self.subs[index].text
-        text = text.replace("\\N", "\n")
-        
-        # Determine style
-        # If this is the one we are calling "active" (passed as target_idx logic in caller), it gets highlighted.
-        # But here we just get index. We need to know if it's the active one.
-        # The caller knows.
-        # Actually, the caller calls this.
-        # Let's check against current time again or pass a flag?
-        # Simpler: The caller is drawing the "centered" one specifically.
-        # But wait, draw_subtitle logic inside used to check anchor="center" to decide color.
-        # I should keep that logic or make it explicit.
-        
-        if anchor == "center":
-            font = ("Arial", 16, "bold")
-            color = "yellow"
-        else:
-            font = ("Arial", 12, "bold")
-            color = "white"
+                line_top = current_bottom_y - self.text_height(i, NORMAL_STYLE)
+                placed.append((i, line_top, NORMAL_STYLE))
+                current_bottom_y = line_top - 10
             
-        # We need x position to be center of window
-        x_pos = self.canvas.winfo_width() / 2
+            first_next = target_idx + 1
+            current_top_y = center_y + active_height / 2 + 10
+        else:
+            # No subtitle started yet: the first ones wait slightly below center
+            first_next = 0
+            current_top_y = center_y + 50
+        
+        # Next subtitles (going down)
+        for i in range(first_next, len(self.subs)):
+            if current_top_y > height:
+                break
+            placed.append((i, current_top_y, NORMAL_STYLE))
+            current_top_y += self.text_height(i, NORMAL_STYLE) + 10
         
-        item = self.canvas.create_text(x_pos, y_pos, text=text, fill=color, font=font, width=350, justify=tk.CENTER, anchor=anchor)
-        return self.canvas.bbox(item)
+        self.place_items(placed, width / 2)
+
+    def place_items(self, placed, x_pos):
+        """
+        Moves the retained text items to their new places. Lines that stay
+        in view keep their item and only move; items for lines that left the
+        view are hidden and reused for the lines coming in.
+        """
+        shown = {}
+        for index, top_y, style in placed:
+            entry = self.items.pop(index, None)
+            if entry is None:
+                item = self.spare_items.pop() if self.spare_items else self.canvas.create_text(
+                    0, 0, width=TEXT_WIDTH, justify=tk.CENTER, anchor="n")
+                self.canvas.itemconfig(item, text=self.subs.texts[index], font=style[0], fill=style[1], state="normal")
+            else:
+                item, old_style = entry
+                if old_style != style:
+                    self.canvas.itemconfig(item, font=style[0], fill=style[1])
+            self.canvas.coords(item, x_pos, top_y)
+            shown[index] = (item, style)
+        
+        for item, _ in self.items.values():
+            self.canvas.itemconfig(item, state="hidden")
+            self.spare_items.append(item)
+        self.items = shown
+
+    def clear_items(self):
+        # Subtitles changed: every line item and cached height is stale
+        for item, _ in self.items.values():
+            self.canvas.itemconfig(item, state="hidden")
+            self.spare_items.append(item)
+        self.items = {}
+        self.text_heights = {}
+
+    def text_height(self, index, style):
+        """Wrapped height of a subtitle in a style, measured once off-screen."""
+        key = (index, style[0], TEXT_WIDTH)
+        height = self.text_heights.get(key)
+        if height is None:
+            self.canvas.itemconfig(self.measure_item, text=self.subs.texts[index], font=style[0])
+            x1, y1, x2, y2 = self.canvas.bbox(self.measure_item)
+            height = y2 - y1
+            self.text_heights[key] = height
+        return height
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -1,69 +1,23 @@
-import re
 import sys
-import datetime
-from datetime import timedelta
+from cue_timeline import CueTimeline, parse_timestamp
+from interval_index import IntervalIndex
+from subtitle_writer import format_timestamp
 
 def parse_time(time_str):
-    """Parses an SRT time string (HH:MM:SS,mmm) into a timedelta."""
-    try:
-        # Handle comma or dot for milliseconds
-        time_str = time_str.replace('.', ',')
-        hours, minutes, rest = time_str.split(':')
-        seconds, milliseconds = rest.split(',')
-        return timedelta(hours=int(hours), minutes=int(minutes), seconds=int(seconds), milliseconds=int(milliseconds))
-    except ValueError:
-        raise ValueError(f"Invalid time format: {time_str}. Expected HH:MM:SS,mmm")
+    """Parses an SRT time string (HH:MM:SS,mmm) into integer milliseconds."""
+    return parse_timestamp(time_str)
 
-def format_time(td):
-    """Formats a timedelta into an SRT time string (HH:MM:SS,mmm)."""
-    total_seconds = int(td.total_seconds())
-    hours = total_seconds // 3600
-    minutes = (total_seconds % 3600) // 60
-    seconds = total_seconds % 60
-    milliseconds = int(td.microseconds / 1000)
-    return f"{hours:02}:{minutes:02}:{seconds:02},{milliseconds:03}"
+def format_time(ms):
+    """Formats integer milliseconds into an SRT time string (HH:MM:SS,mmm)."""
+    return format_timestamp(ms)
 
 def parse_srt(filename):
-    """Parses an SRT file into a list of blocks."""
-    with open(filename, 'r', encoding='utf-8') as f:
-        content = f.read()
+    """Parses an SRT file into a CueTimeline."""
+    return CueTimeline.load_srt(filename)
 
-    # Split by double newlines, but handle potential extra whitespace
-    raw_blocks = re.split(r'\n\s*\n', content.strip())
-    blocks = []
-    
-    for rb in raw_blocks:
-        lines = rb.strip().split('\n')
-        if len(lines) >= 3:
-            index = lines[0]
-            time_line = lines[1]
-            text = '\n'.join(lines[2:])
-            
-            # Parse times
-            if '-->' in time_line:
-                start_str, end_str = time_line.split('-->')
-            else:
-                # Fallback or error
-                raise ValueError(f"Invalid time line format: {time_line}")
-                
-            start_time = parse_time(start_str.strip())
-            end_time = parse_time(end_str.strip())
-            
-            blocks.append({
-                'index': index,
-                'start': start_time,
-                'end': end_time,
-                'text': text
-            })
-    return blocks
-
-def save_srt(blocks, filename):
-    """Saves a list of blocks to an SRT file."""
-    with open(filename, 'w', encoding='utf-8') as f:
-        for i, block in enumerate(blocks):
-            f.write(f"{i + 1}\n")
-            f.write(f"{format_time(block['start'])} --> {format_time(block['end'])}\n")
-            f.write(f"{block['text']}\n\n")
+def save_srt(timeline, filename):
+    """Saves a CueTimeline to an SRT file."""
+    timeline.save(filename, 'srt')
 
 def get_user_input():
     filename = input("Enter the subtitle filename (e.g., video.srt): ").strip()
@@ -90,7 +44,16 @@ def get_user_input():
     return filename, pivot_time, mode, target_time, source_time
 
 def adjust_subtitles(filename, pivot_time, mode, target_time=None, source_time=None):
-    blocks = parse_srt(filename)
+    timeline = parse_srt(filename)
+    starts, ends = timeline.starts, timeline.ends
+    # Cue positions by time, for the lookups below. The lookups pick cues
+    # in file order; the index only agrees with that when the cues are
+    # sorted by start, so unsorted files are scanned linearly instead.
+    if all(starts[i] <= starts[i + 1] for i in range(len(timeline) - 1)):
+        index = IntervalIndex((starts[i], ends[i], i) for i in range(len(timeline)))
+    else:
+        print("Subtitles are not sorted by start time; scanning them in file order.")
+        index = None
     
     if mode == 'reduce':
         if source_time is None:
@@ -100,54 +63,47 @@ def adjust_subtitles(filename, pivot_time, mode, target_time=None, source_time=N
         # Find the block to move (move_block)
         # 1. If source_time is inside a block (start <= source < end), that's the block.
         # 2. Otherwise, it's the first block where start >= source_time.
-        move_block_index = -1
-        for i, block in enumerate(blocks):
-            if block['start'] <= source_time < block['end']:
-                move_block_index = i
-                break
-            if block['start'] >= source_time:
-                move_block_index = i
-                break
+        if index is None:
+            move_block_index = next((i for i in range(len(timeline))
+                                     if starts[i] <= source_time < ends[i] or starts[i] >= source_time), -1)
+        else:
+            # The first cue in file order matching either rule
+            candidates = [i for i in index.overlapping(source_time, source_time) if source_time < ends[i]]
+            following = index.first_starting_at(source_time)
+            if following is not None:
+                candidates.append(following)
+            move_block_index = min(candidates) if candidates else -1
         
         if move_block_index == -1:
              print("No suitable subtitle block found for the given source time.")
              return
 
-        target_block = blocks[move_block_index]
-        
         # Calculate shift: how much we are moving the target BACK (earlier)
         # The target's NEW start will be pivot_time.
         # So shift = target.start - pivot_time (this is a positive duration)
-        shift = target_block['start'] - pivot_time
+        shift = starts[move_block_index] - pivot_time
         
-        print(f"Target block found at {format_time(target_block['start'])} (Index {target_block['index']}). shifting to {format_time(pivot_time)}.")
-        print(f"Shift amount: {shift.total_seconds()}s")
+        print(f"Target block found at {format_time(starts[move_block_index])} (Index {move_block_index + 1}). shifting to {format_time(pivot_time)}.")
+        print(f"Shift amount: {shift / 1000}s")
 
         # Delete intermediate blocks
         # We need to remove blocks that fall between pivot_time and target_block['start']
         # Specifically, any block BEFORE the move_block that ends AFTER the pivot_time (new start)
         # will overlap with the shifted content.
         
-        blocks_to_keep = []
-        # Iterate up to move_block_index
-        for i in range(move_block_index):
-            # Check if this block overlaps with the new start time (Pivot)
-            # Overlap condition: Block.End > Pivot
-            if blocks[i]['end'] > pivot_time:
-                print(f"Deleting intermediate/overlapping block {blocks[i]['index']} ({format_time(blocks[i]['start'])} --> {format_time(blocks[i]['end'])})")
-                continue # Skip/Delete
-            blocks_to_keep.append(blocks[i])
+        # Overlap condition: Block.End > Pivot
+        if index is None:
+            deleted = [i for i in range(move_block_index) if ends[i] > pivot_time]
+        else:
+            deleted = sorted(i for i in index.overlapping(pivot_time + 1, float('inf')) if i < move_block_index)
+        for i in deleted:
+            print(f"Deleting intermediate/overlapping block {i + 1} ({format_time(starts[i])} --> {format_time(ends[i])})")
+        deleted = set(deleted)
+        keep = [i for i in range(move_block_index) if i not in deleted]
             
         # Now process Target and subsequent
-        shifted_blocks = []
-        for i in range(move_block_index, len(blocks)):
-            block = blocks[i]
-            block['start'] -= shift
-            block['end'] -= shift
-            shifted_blocks.append(block)
-            
-        final_blocks = blocks_to_keep + shifted_blocks
-        blocks = final_blocks
+        timeline.shift(move_block_index, -shift)
+        timeline = timeline.select(keep + list(range(move_block_index, len(timeline))))
 
     elif mode == 'extend':
         if target_time is None:
@@ -159,21 +115,25 @@ def adjust_subtitles(filename, pivot_time, mode, target_time=None, source_time=N
         anchor_index = -1
         
         # Scenario A: Check if Pivot inside a subtitle
-        for i, block in enumerate(blocks):
-            if block['start'] <= pivot_time <= block['end']:
-                normalized_pivot = block['start']
-                anchor_index = i
-                print(f"Pivot Time {format_time(pivot_time)} falls within subtitle {block['index']}. Snapping to Start Time: {format_time(normalized_pivot)}")
-                break
+        if index is None:
+            containing = [i for i in range(len(timeline)) if starts[i] <= pivot_time <= ends[i]]
+        else:
+            containing = index.overlapping(pivot_time, pivot_time)
+        if containing:
+            anchor_index = min(containing)
+            normalized_pivot = starts[anchor_index]
+            print(f"Pivot Time {format_time(pivot_time)} falls within subtitle {anchor_index + 1}. Snapping to Start Time: {format_time(normalized_pivot)}")
         
         # Scenario B: Pivot in gap (or before first block)
         if normalized_pivot is None:
-            for i, block in enumerate(blocks):
-                if block['start'] > pivot_time:
-                    normalized_pivot = block['start']
-                    anchor_index = i
-                    print(f"Pivot Time {format_time(pivot_time)} falls in a gap. Snapping to next subtitle {block['index']} Start Time: {format_time(normalized_pivot)}")
-                    break
+            if index is None:
+                following = next((i for i in range(len(timeline)) if starts[i] > pivot_time), None)
+            else:
+                following = index.first_starting_at(pivot_time + 1)
+            if following is not None:
+                anchor_index = following
+                normalized_pivot = starts[anchor_index]
+                print(f"Pivot Time {format_time(pivot_time)} falls in a gap. Snapping to next subtitle {anchor_index + 1} Start Time: {format_time(normalized_pivot)}")
         
         if anchor_index == -1:
             print("No suitable subtitle found after the pivot time to extend/shift.")
@@ -186,20 +146,18 @@ def adjust_subtitles(filename, pivot_time, mode, target_time=None, source_time=N
         # If Target is LATER (Extend), Shift > 0. If EARLIER, Shift < 0.
         shift_amount = target_time - normalized_pivot
         
-        print(f"shifting timeline by {shift_amount.total_seconds()}s (Target: {format_time(target_time)})")
+        print(f"shifting timeline by {shift_amount / 1000}s (Target: {format_time(target_time)})")
 
         # 3. Ripple Effect
         # Apply shift to anchor block and all subsequent blocks
-        for i in range(anchor_index, len(blocks)):
-            blocks[i]['start'] += shift_amount
-            blocks[i]['end'] += shift_amount
+        timeline.shift(anchor_index, shift_amount)
 
     # Save
     out_filename = filename.replace('.srt', '_adjusted.srt')
     if out_filename == filename:
         out_filename = filename + ".adjusted.srt"
         
-    save_srt(blocks, out_filename)
+    save_srt(timeline, out_filename)
     print(f"Saved adjusted subtitles to {out_filename}")
 
 if __name__ == "__main__":
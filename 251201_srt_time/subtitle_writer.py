@@ -0,0 +1,114 @@
+import os
+
+# Cues formatted per write() call
+CHUNK_CUES = 4096
+
+NEWLINE = '\n'
+ASS_NEWLINE = '\\N'
+
+ASS_HEADER = """[Script Info]
+ScriptType: v4.00+
+PlayResX: 1920
+PlayResY: 1080
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+Style: Default,Arial,56,&H00FFFFFF,&H000000FF,&H00000000,&H80000000,0,0,0,0,100,100,0,0,1,2,1,2,20,20,40,1
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+
+# "000".."999" and memos of the seconds prefix: consecutive cues mostly
+# fall in seconds already seen, so formatting is two lookups and a concat
+_MILLIS = [f"{i:03}" for i in range(1000)]
+_CENTIS = [f"{i:02}" for i in range(100)]
+_CACHE_LIMIT = 1 << 20
+_HMS_CACHE = {}
+_ASS_HMS_CACHE = {}
+
+def _hms(seconds, cache=_HMS_CACHE, hour_width=2):
+    prefix = cache.get(seconds)
+    if prefix is None:
+        minutes, secs = divmod(seconds, 60)
+        hours, minutes = divmod(minutes, 60)
+        prefix = f"{hours:0{hour_width}}:{minutes:02}:{secs:02}"
+        if len(cache) >= _CACHE_LIMIT:
+            cache.clear()
+        cache[seconds] = prefix
+    return prefix
+
+def format_timestamp(ms, separator=','):
+    """
+    Formats integer milliseconds as HH:MM:SS,mmm (SRT) or HH:MM:SS.mmm (WebVTT).
+    """
+    seconds, millis = divmod(int(ms), 1000)
+    return _hms(seconds) + separator + _MILLIS[millis]
+
+def format_ass_timestamp(ms):
+    """
+    Formats integer milliseconds as H:MM:SS.cc (ASS uses centiseconds).
+    """
+    seconds, millis = divmod(int(ms), 1000)
+    return _hms(seconds, _ASS_HMS_CACHE, 1) + '.' + _CENTIS[millis // 10]
+
+def _srt_chunk(cues, first_index):
+    return "".join(
+        f"{i}\n{format_timestamp(start)} --> {format_timestamp(end)}\n{text}\n\n"
+        for i, (start, end, text) in enumerate(cues, first_index)
+    )
+
+def _vtt_chunk(cues, first_index):
+    return "".join(
+        f"{i}\n{format_timestamp(start, '.')} --> {format_timestamp(end, '.')}\n{text}\n\n"
+        for i, (start, end, text) in enumerate(cues, first_index)
+    )
+
+def _ass_chunk(cues, first_index):
+    # ASS events are single lines; line breaks inside a cue are written as \N
+    return "".join(
+        f"Dialogue: 0,{format_ass_timestamp(start)},{format_ass_timestamp(end)},Default,,0,0,0,,"
+        f"{text.replace(NEWLINE, ASS_NEWLINE)}\n"
+        for start, end, text in cues
+    )
+
+# format name -> (file header, chunk formatter)
+FORMATS = {
+    'srt': ("", _srt_chunk),
+    'vtt': ("WEBVTT\n\n", _vtt_chunk),
+    'ass': (ASS_HEADER, _ass_chunk),
+}
+
+def format_from_path(path):
+    """Returns the subtitle format for a file extension (srt when unknown)."""
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    return extension if extension in FORMATS else 'srt'
+
+def write_subtitles(cues, output_file, fmt=None):
+    """
+    Writes cues to a subtitle file in large buffered chunks.
+
+    Args:
+        cues (iterable): (start_ms, end_ms, text) tuples with integer milliseconds.
+            May be a generator; only CHUNK_CUES cues are held at a time.
+        output_file (str): Path to save the file.
+        fmt (str): 'srt', 'vtt' or 'ass'. Defaults to the file extension.
+
+    Returns:
+        int: The number of cues written.
+    """
+    header, format_chunk = FORMATS[fmt or format_from_path(output_file)]
+    count = 0
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(header)
+        chunk = []
+        for cue in cues:
+            chunk.append(cue)
+            if len(chunk) >= CHUNK_CUES:
+                f.write(format_chunk(chunk, count + 1))
+                count += len(chunk)
+                chunk = []
+        if chunk:
+            f.write(format_chunk(chunk, count + 1))
+            count += len(chunk)
+    return count
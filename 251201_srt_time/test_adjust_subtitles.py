@@ -0,0 +1,52 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from adjust_subtitles import adjust_subtitles, format_time, parse_srt
+
+class AdjustSubtitlesTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'video.srt')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def adjust(self, cues, pivot, mode, target=None, source=None):
+        """Runs adjust_subtitles on cues given as (start, end) ms pairs; returns the output cues."""
+        with open(self.path, 'w', encoding='utf-8') as f:
+            for i, (start, end) in enumerate(cues):
+                f.write(f"{i + 1}\n{format_time(start)} --> {format_time(end)}\nCue {i + 1}\n\n")
+        with contextlib.redirect_stdout(io.StringIO()):
+            adjust_subtitles(self.path, pivot, mode, target, source)
+        return list(parse_srt(os.path.join(self.temp_dir, 'video_adjusted.srt')))
+
+    def test_extend_overlapping_pivot_snaps_to_first_cue(self):
+        cues = [(1000, 3000), (2000, 4000), (5000, 6000)]
+        self.assertEqual(self.adjust(cues, 2500, 'extend', target=1500), [
+            (1500, 3500, 'Cue 1'), (2500, 4500, 'Cue 2'), (5500, 6500, 'Cue 3')])
+
+    def test_reduce_overlapping_deletes_every_overlapped_cue(self):
+        cues = [(1000, 3000), (2000, 4000), (5000, 6000)]
+        self.assertEqual(self.adjust(cues, 2500, 'reduce', source=4500), [(2500, 3500, 'Cue 3')])
+
+    def test_reduce_prefers_earlier_cue_starting_at_source(self):
+        # Cue 1 is zero-length at the source time and comes first in the file
+        cues = [(1000, 1000), (1000, 2000), (3000, 4000)]
+        self.assertEqual(self.adjust(cues, 500, 'reduce', source=1000), [
+            (500, 500, 'Cue 1'), (500, 1500, 'Cue 2'), (2500, 3500, 'Cue 3')])
+
+    def test_extend_unsorted_uses_file_order(self):
+        cues = [(1000, 2000), (5000, 6000), (3000, 4000)]
+        self.assertEqual(self.adjust(cues, 2500, 'extend', target=7000), [
+            (1000, 2000, 'Cue 1'), (7000, 8000, 'Cue 2'), (5000, 6000, 'Cue 3')])
+
+    def test_reduce_unsorted_uses_file_order(self):
+        cues = [(1000, 2000), (5000, 6000), (3000, 4000)]
+        self.assertEqual(self.adjust(cues, 2000, 'reduce', source=2500), [
+            (1000, 2000, 'Cue 1'), (2000, 3000, 'Cue 2'), (0, 1000, 'Cue 3')])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,11 @@
 import webview
+import base64
 import json
-import os
-import io
-import subprocess
-import array
+import math
 from audio_handler import AudioHandler
+from envelope import DECODE_RATE, load_pyramid
+from peak_cache import PeakCache
+from playback_clock import PlaybackClock
 from subtitle_manager import SubtitleManager
 
 class Api:
@@ -12,7 +13,15 @@ class Api:
         self.window = window
         self.audio = AudioHandler()
         self.subs = SubtitleManager()
-        self.waveform_data = None
+        self.waveform = None # EnvelopePyramid of the loaded audio
+        self.edit_version = 0 # Bumped by every load and applied edit batch
+        try:
+            self.peak_cache = PeakCache()
+        except OSError as e:
+            print(f"Waveform cache disabled: {e}")
+            self.peak_cache = None
+        self.clock = PlaybackClock(self.audio, self._push_clock)
+        self.clock.start()
         
     def load_file_dialog(self):
         # 1. Select Audio
@@ -42,55 +51,92 @@ class Api:
         
         # Load Subs
         self.subs.load_srt(srt_path)
-        subs_list = [{
-            'index': s.index,
-            'start': s.start_time,
-            'end': s.end_time,
-            'text': s.text
-        } for s in self.subs.subtitles]
+        self.edit_version += 1
+        subs_list = self._subtitle_list()
 
         # Process Waveform
-        envelope = []
+        # ffmpeg output is folded into the envelope block by block,
+        # so the decoded PCM is never held in memory as a whole;
+        # peaks computed before for this exact file come from the cache
         duration = 0
         try:
-            cmd = [
-                'ffmpeg', '-i', audio_path, '-f', 's16le', '-ac', '1', '-ar', '8000', '-v', 'quiet', '-'
-            ]
-            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            raw_data, _ = process.communicate()
-            
-            if raw_data:
-                samples = array.array('h', raw_data)
-                total_samples = len(samples)
-                original_rate = 8000
-                
-                # Downsample to 100Hz for visual
-                target_rate = 100
-                chunk_size = int(original_rate / target_rate)
-                
-                for i in range(0, total_samples, chunk_size):
-                    chunk = samples[i:i+chunk_size]
-                    if not chunk: break
-                    envelope.append([min(chunk), max(chunk)])
-                    
-                self.waveform_data = envelope
-                duration = total_samples / original_rate
+            # Downsample to 100Hz for visual
+            target_rate = 100
+            chunk_size = int(DECODE_RATE / target_rate)
+            if self.waveform is not None:
+                self.waveform.close() # Unmaps cached peaks
+                self.waveform = None
+            pyramid = self.peak_cache.load(audio_path, target_rate) if self.peak_cache else None
+            if pyramid is None:
+                pyramid = load_pyramid(audio_path, chunk_size)
+                if self.peak_cache:
+                    self.peak_cache.save(audio_path, pyramid)
+            duration = pyramid.duration
+            self.waveform = pyramid
                 
         except Exception as e:
             print(f"Error processing waveform: {e}")
             return {"success": False, "error": str(e)}
 
+        # The page fetches only the windows it draws (get_waveform_window)
         return {
             "success": True, 
             "duration": duration, 
-            "waveform": envelope,
-            "subtitles": subs_list
+            "waveform": {
+                "sampleRate": pyramid.base_rate,
+                "levels": len(pyramid.levels)
+            },
+            "subtitles": subs_list,
+            "version": self.edit_version
+        }
+
+    def _subtitle_list(self):
+        return [{
+            'index': s.index,
+            'start': s.start_time,
+            'end': s.end_time,
+            'text': s.text
+        } for s in self.subs.subtitles]
+
+    def get_subtitles(self):
+        # Lets the page resync after a rejected edit batch
+        return {"success": True, "subtitles": self._subtitle_list(), "version": self.edit_version}
+
+    def get_waveform_window(self, start, end, resolution):
+        """
+        Returns the envelope between start and end (seconds) from the
+        coarsest pyramid level with at least `resolution` points per second,
+        as base64 of little-endian Int16 min/max pairs. `offset` is the index
+        of the first point at that level; the window is widened to whole points.
+        """
+        if self.waveform is None:
+            return {"success": False, "error": "No audio loaded"}
+        pyramid = self.waveform
+        level = pyramid.level_for(float(resolution))
+        rate = pyramid.rate(level)
+        points = pyramid.levels[level]
+        try:
+            total = len(points) // 2
+            first = min(max(0, math.floor(float(start) * rate)), total)
+            last = min(max(first, math.ceil(float(end) * rate)), total)
+            data = bytes(points[2 * first:2 * last])
+        except ValueError:
+            # The pyramid was closed by a load that replaced it
+            return {"success": False, "error": "Audio was replaced"}
+        return {
+            "success": True,
+            "level": level,
+            "rate": rate,
+            "offset": first,
+            "count": last - first,
+            "data": base64.b64encode(data).decode('ascii')
         }
 
     # Combined loader replaces separate dialogs
     
     def play(self, start_time):
         self.audio.play(float(start_time))
+        self.clock.wake()
         return {"success": True}
 
     def pause(self):
@@ -99,6 +145,12 @@ class Api:
 
     def get_current_time(self):
         return self.audio.get_current_time()
+
+    def _push_clock(self, sample):
+        # Runs on the clock thread; the page interpolates between samples
+        if self.window is None:
+            return
+        self.window.evaluate_js(f"onClockSample({json.dumps(sample)})")
         
     def save_subtitles_dialog(self):
         if not self.subs.subtitles:
@@ -119,20 +171,60 @@ class Api:
             return {"success": True}
         return {"success": False}
 
+    def apply_edits(self, ops, base_version=None):
+        """
+        Applies a batch of subtitle edits atomically: every op is checked
+        before any is applied, so a bad op leaves all subtitles untouched.
+
+        Ops are dicts, applied in order:
+            {"op": "timing", "index": i, "start": s, "end": e}
+            {"op": "text", "index": i, "text": t}
+            {"op": "shift", "from": s, "delta": d}   (ripple edit)
+        Indexes are 1-based, as sent to the page; times are in seconds.
+        If base_version is given and the subtitles
+        changed since the page saw that version, the batch is rejected.
+        Returns the new version on success.
+        """
+        if base_version is not None and int(base_version) != self.edit_version:
+            return {"success": False, "error": f"Subtitles changed since version {base_version}", "version": self.edit_version}
+
+        changes = []
+        try:
+            for op in ops:
+                kind = op.get("op")
+                if kind not in ("timing", "text", "shift"):
+                    raise ValueError(f"Unknown edit op: {kind}")
+                if kind == "shift":
+                    changes.append((kind, None, (float(op["from"]), float(op["delta"]))))
+                    continue
+                sub = self.subs.get_subtitle_by_index(int(op["index"]))
+                if sub is None:
+                    raise ValueError(f"Subtitle {op['index']} not found")
+                if kind == "timing":
+                    start, end = float(op["start"]), float(op["end"])
+                    if not 0 <= start <= end:
+                        raise ValueError(f"Invalid timing for subtitle {op['index']}: {start} - {end}")
+                    changes.append((kind, sub, (start, end)))
+                else:
+                    changes.append((kind, sub, str(op["text"])))
+        except KeyError as e:
+            return {"success": False, "error": f"Edit op missing {e}", "version": self.edit_version}
+        except (TypeError, ValueError, AttributeError) as e:
+            return {"success": False, "error": str(e), "version": self.edit_version}
+
+        for kind, sub, value in changes:
+            if kind == "timing":
+                sub.start_time, sub.end_time = value
+            elif kind == "text":
+                sub.text = value
+            else:
+                self.subs.shift_subtitles(*value)
+        self.edit_version += 1
+        return {"success": True, "version": self.edit_version}
+
     def update_subtitle_timing(self, index, start, end):
-        # index is 1-based from frontend usually, but let's check.
-        # Front end uses s.index which is from subtitle file.
-        # SubtitleManager.get_subtitle_by_index uses 1-based.
-        sub = self.subs.get_subtitle_by_index(int(index))
-        if sub:
-            sub.start_time = float(start)
-            sub.end_time = float(end)
-            return {"success": True}
-        return {"success": False, "error": "Subtitle not found"}
+        # Single-cue shortcut for apply_edits
+        return self.apply_edits([{"op": "timing", "index": index, "start": start, "end": end}])
 
     def update_subtitle_text(self, index, text):
-        sub = self.subs.get_subtitle_by_index(int(index))
-        if sub:
-            sub.text = text
-            return {"success": True}
-        return {"success": False, "error": "Subtitle not found"}
+        return self.apply_edits([{"op": "text", "index": index, "text": text}])
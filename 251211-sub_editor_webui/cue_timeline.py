@@ -0,0 +1,99 @@
+import array
+import re
+from subtitle_writer import write_subtitles
+
+TIMESTAMP_RE = re.compile(r'\s*(\d+):(\d{1,2}):(\d{1,2})[,.](\d{1,3})\s*$')
+
+def parse_timestamp(time_str):
+    """
+    Parses HH:MM:SS,mmm (or HH:MM:SS.mmm) into integer milliseconds.
+    """
+    match = TIMESTAMP_RE.match(time_str)
+    if not match:
+        raise ValueError(f"Invalid time format: {time_str}. Expected HH:MM:SS,mmm")
+    hours, minutes, seconds, millis = match.groups()
+    # "1,5" means 500 ms, not 5 ms
+    millis = int(millis.ljust(3, '0'))
+    return ((int(hours) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + millis
+
+def seconds_to_ms(seconds):
+    """Converts float seconds to integer milliseconds, rounding to the nearest."""
+    return int(round(seconds * 1000))
+
+class CueTimeline:
+    """
+    Subtitle cues with start and end stored as integer milliseconds in
+    compact arrays, and the texts in a parallel list.
+
+    Times never go through floats, so parsing and saving are exact and
+    repeated edits cannot accumulate rounding drift.
+    """
+    def __init__(self):
+        self.starts = array.array('q')
+        self.ends = array.array('q')
+        self.texts = []
+
+    def __len__(self):
+        return len(self.texts)
+
+    def __iter__(self):
+        return zip(self.starts, self.ends, self.texts)
+
+    def append(self, start_ms, end_ms, text):
+        self.starts.append(start_ms)
+        self.ends.append(end_ms)
+        self.texts.append(text)
+
+    def insert(self, position, start_ms, end_ms, text):
+        self.starts.insert(position, start_ms)
+        self.ends.insert(position, end_ms)
+        self.texts.insert(position, text)
+
+    def delete(self, position):
+        del self.starts[position]
+        del self.ends[position]
+        del self.texts[position]
+
+    def select(self, positions):
+        """Returns a new timeline holding only the cues at positions, in that order."""
+        timeline = CueTimeline()
+        for i in positions:
+            timeline.append(self.starts[i], self.ends[i], self.texts[i])
+        return timeline
+
+    def shift(self, from_position, delta_ms):
+        """Moves every cue from from_position onwards by delta_ms."""
+        for i in range(from_position, len(self.texts)):
+            self.starts[i] += delta_ms
+            self.ends[i] += delta_ms
+
+    @classmethod
+    def parse_srt(cls, content):
+        """
+        Parses SRT text. Blocks without a '-->' time line are skipped;
+        a malformed timestamp raises ValueError.
+        """
+        timeline = cls()
+        for block in re.split(r'\n\s*\n', content.replace('\r\n', '\n').strip()):
+            lines = block.strip().split('\n')
+            # The index line is optional; the time line is whichever comes first
+            for t, line in enumerate(lines[:2]):
+                if '-->' in line:
+                    break
+            else:
+                continue
+            start_str, end_str = lines[t].split('-->', 1)
+            # WebVTT-style cue settings may follow the end time
+            end_str = end_str.strip().split(' ', 1)[0]
+            timeline.append(parse_timestamp(start_str), parse_timestamp(end_str), '\n'.join(lines[t + 1:]))
+        return timeline
+
+    @classmethod
+    def load_srt(cls, filepath):
+        with open(filepath, 'r', encoding='utf-8-sig') as f:
+            return cls.parse_srt(f.read())
+
+    def save(self, filepath, fmt=None):
+        """Writes the cues as SRT (or WebVTT/ASS, by extension or fmt)."""
+        return write_subtitles(iter(self), filepath, fmt)
+
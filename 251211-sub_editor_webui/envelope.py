@@ -0,0 +1,254 @@
+import array
+import subprocess
+import threading
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+def minmax_envelope(pcm, chunk_size):
+    """
+    Reduces 16-bit mono PCM to the min and max of every chunk_size samples.
+
+    Args:
+        pcm (bytes-like): Raw s16le samples, as read from ffmpeg.
+        chunk_size (int): Samples per envelope point.
+
+    Returns:
+        array.array('h'): Interleaved min, max pairs; a short last chunk
+            still gets its own pair.
+    """
+    if np is not None:
+        return _minmax_numpy(pcm, chunk_size)
+    return _minmax_python(pcm, chunk_size)
+
+def _minmax_numpy(pcm, chunk_size):
+    samples = np.frombuffer(pcm, dtype='<i2', count=len(pcm) // 2)
+    whole = len(samples) // chunk_size
+    tail = samples[whole * chunk_size:]
+    # One reshape, one pass per reduction; no per-chunk Python work
+    blocks = samples[:whole * chunk_size].reshape(whole, chunk_size)
+    out = np.empty(2 * (whole + (1 if len(tail) else 0)), dtype=np.int16)
+    out[0:2 * whole:2] = blocks.min(axis=1)
+    out[1:2 * whole:2] = blocks.max(axis=1)
+    if len(tail):
+        out[-2] = tail.min()
+        out[-1] = tail.max()
+    return array.array('h', out.tobytes())
+
+def _minmax_python(pcm, chunk_size):
+    # Same result without NumPy; one slice per chunk, so much slower
+    samples = array.array('h', bytes(pcm[:len(pcm) // 2 * 2]))
+    envelope = array.array('h')
+    append = envelope.append
+    for i in range(0, len(samples), chunk_size):
+        chunk = samples[i:i + chunk_size]
+        append(min(chunk))
+        append(max(chunk))
+    return envelope
+
+def fold_pairs(pairs):
+    """
+    Halves the resolution of an interleaved min/max envelope by merging
+    neighbouring pairs. The input must hold an even number of pairs.
+    """
+    if np is not None:
+        quads = np.frombuffer(pairs, dtype=np.int16).reshape(-1, 4)
+        out = np.empty((len(quads), 2), dtype=np.int16)
+        np.minimum(quads[:, 0], quads[:, 2], out=out[:, 0])
+        np.maximum(quads[:, 1], quads[:, 3], out=out[:, 1])
+        return array.array('h', out.tobytes())
+    out = array.array('h')
+    for i in range(0, len(pairs) - 3, 4):
+        out.append(min(pairs[i], pairs[i + 2]))
+        out.append(max(pairs[i + 1], pairs[i + 3]))
+    return out
+
+# Levels above the base; 2**16 base points per top point is more than a film needs
+MAX_LEVELS = 17
+
+class EnvelopePyramid:
+    """
+    Min/max envelopes at power-of-two resolutions, like texture mip-maps.
+    Level 0 is the base envelope (base_rate pairs per second) and every
+    level above merges neighbouring pairs of the one below, halving the rate.
+
+    The base may keep growing while a file decodes; update() folds the new
+    pairs upwards. Levels only grow by whole pairs, so drawing can read them
+    from another thread.
+    """
+    def __init__(self, base_rate, base=None, levels=None):
+        self.base_rate = base_rate
+        self.levels = levels if levels is not None else [base if base is not None else array.array('h')]
+        # Exact audio length in seconds once known
+        self.duration = None
+
+    def __len__(self):
+        # Base points
+        return len(self.levels[0]) // 2
+
+    def close(self):
+        """Releases what backs the levels; nothing for an in-memory pyramid."""
+
+    def rate(self, level):
+        return self.base_rate / (1 << level)
+
+    def level_for(self, pixels_per_second):
+        """The coarsest level that still has at least one point per pixel."""
+        level = 0
+        while level + 1 < len(self.levels) and self.rate(level + 1) >= pixels_per_second:
+            level += 1
+        return level
+
+    def update(self, final=False):
+        """
+        Folds base pairs added since the last call into the upper levels.
+        With final=True, a leftover odd pair is carried up on its own.
+        """
+        for k in range(1, MAX_LEVELS + 1):
+            below = self.levels[k - 1]
+            below_pairs = len(below) // 2
+            if k == len(self.levels):
+                if below_pairs < 2:
+                    break
+                self.levels.append(array.array('h'))
+            level = self.levels[k]
+            done = len(level) // 2
+            new = (below_pairs - 2 * done) // 2
+            if new:
+                level.extend(fold_pairs(below[4 * done:4 * (done + new)]))
+            if final and below_pairs - 2 * (done + new) == 1:
+                level.extend(below[-2:])
+
+# PCM handed to the envelope: 8 kHz mono s16le is plenty for drawing
+DECODE_RATE = 8000
+# Bytes read from ffmpeg per block (about 4 s of audio)
+BLOCK_BYTES = 64 * 1024
+
+def decode_command(filepath, rate=DECODE_RATE):
+    return ['ffmpeg', '-i', filepath, '-f', 's16le', '-ac', '1', '-ar', str(rate), '-v', 'quiet', '-']
+
+def probe_duration(filepath):
+    """Returns the container duration in seconds via ffprobe, or None."""
+    cmd = ['ffprobe', '-v', 'quiet', '-show_entries', 'format=duration', '-of', 'csv=p=0', filepath]
+    try:
+        output = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True).stdout
+        return float(output.strip())
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return None
+
+def decode_blocks(filepath, rate=DECODE_RATE, block_bytes=BLOCK_BYTES, stop=None):
+    """
+    Yields decoded PCM from ffmpeg in blocks of up to block_bytes as it
+    arrives, so the whole stream is never held in memory. Setting the
+    `stop` event ends the stream early and kills ffmpeg.
+    """
+    process = subprocess.Popen(decode_command(filepath, rate), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        while stop is None or not stop.is_set():
+            block = process.stdout.read(block_bytes)
+            if not block:
+                break
+            yield block
+    finally:
+        process.stdout.close()
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+
+class EnvelopeBuilder:
+    """
+    Folds PCM blocks of any size into a min/max envelope as they arrive.
+    Samples that do not fill a whole chunk wait for the next block.
+
+    `envelope` only ever grows by whole min/max pairs, so another thread
+    may read it while blocks are being fed.
+    """
+    def __init__(self, chunk_size):
+        self.chunk_size = chunk_size
+        self.envelope = array.array('h')
+        self.bytes_fed = 0
+        self.pending = b''
+
+    @property
+    def samples(self):
+        return self.bytes_fed // 2
+
+    def feed(self, pcm):
+        self.bytes_fed += len(pcm)
+        data = self.pending + pcm if self.pending else pcm
+        whole = len(data) // (2 * self.chunk_size) * (2 * self.chunk_size)
+        if whole:
+            self.envelope.extend(minmax_envelope(memoryview(data)[:whole], self.chunk_size))
+        self.pending = bytes(data[whole:])
+
+    def finish(self):
+        if len(self.pending) >= 2:
+            self.envelope.extend(minmax_envelope(self.pending, self.chunk_size))
+        self.pending = b''
+        return self.envelope
+
+def load_pyramid(filepath, chunk_size, rate=DECODE_RATE):
+    """
+    Streams an audio file through ffmpeg into an envelope pyramid whose
+    base has one point per chunk_size samples.
+    """
+    builder = EnvelopeBuilder(chunk_size)
+    pyramid = EnvelopePyramid(rate / chunk_size, builder.envelope)
+    for block in decode_blocks(filepath, rate):
+        builder.feed(block)
+        pyramid.update()
+    builder.finish()
+    pyramid.update(final=True)
+    pyramid.duration = builder.samples / rate
+    return pyramid
+
+class EnvelopeLoader(threading.Thread):
+    """
+    Builds an envelope pyramid on a background thread. The UI polls
+    `pyramid` (a growing partial result), `decoded_seconds`, `progress`
+    and, once the thread has finished, `error`.
+
+    A finished pyramid is saved to `cache` (a PeakCache) when one is given.
+    """
+    def __init__(self, filepath, chunk_size, rate=DECODE_RATE, cache=None):
+        super().__init__(daemon=True)
+        self.filepath = filepath
+        self.rate = rate
+        self.builder = EnvelopeBuilder(chunk_size)
+        self.pyramid = EnvelopePyramid(rate / chunk_size, self.builder.envelope)
+        self.cache = cache
+        self.total_duration = None
+        self.error = None
+        self.stop_event = threading.Event()
+
+    @property
+    def decoded_seconds(self):
+        return self.builder.samples / self.rate
+
+    @property
+    def progress(self):
+        """Fraction decoded (0-1), or None while the total length is unknown."""
+        if not self.total_duration:
+            return None
+        return min(1.0, self.decoded_seconds / self.total_duration)
+
+    def cancel(self):
+        self.stop_event.set()
+
+    def run(self):
+        try:
+            self.total_duration = probe_duration(self.filepath)
+            for block in decode_blocks(self.filepath, self.rate, stop=self.stop_event):
+                self.builder.feed(block)
+                self.pyramid.update()
+            if self.stop_event.is_set():
+                return
+            self.builder.finish()
+            self.pyramid.update(final=True)
+            self.pyramid.duration = self.decoded_seconds
+            if self.cache is not None:
+                self.cache.save(self.filepath, self.pyramid)
+        except Exception as e:
+            self.error = e
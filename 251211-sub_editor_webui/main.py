@@ -60,7 +60,7 @@ class VoiceSubtitleEditor:
         self.btn_end_down.pack()
 
         # Waveform
-        self.waveform = WaveformWidget(self.middle_frame, bg='black', on_marker_change=self.update_subtitle_timing)
+        self.waveform = WaveformWidget(self.middle_frame, bg='black', on_marker_change=self.update_subtitle_timing, cue_source=self.subs.get_subtitles_in_range)
         self.waveform.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
         # Bottom: Controls and Subtitle
@@ -144,6 +144,12 @@ class VoiceSubtitleEditor:
     def save_file(self):
         if not self.subs.subtitles:
             return
+        overlaps = self.subs.find_overlaps()
+        if overlaps:
+            first, second = overlaps[0]
+            if not messagebox.askyesno("Overlapping Subtitles",
+                                       f"{len(overlaps)} pair(s) of subtitles overlap, first #{first.index} and #{second.index}. Save anyway?"):
+                return
         path = filedialog.asksaveasfilename(defaultextension=".srt", filetypes=[("Subtitle Files", "*.srt")])
         if path:
             self.subs.save_srt(path)
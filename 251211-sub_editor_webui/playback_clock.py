@@ -0,0 +1,52 @@
+import threading
+import time
+
+# Seconds between clock samples while audio plays
+PUSH_INTERVAL = 0.25
+
+class PlaybackClock(threading.Thread):
+    """
+    Pushes playback clock samples to the page instead of letting it poll.
+
+    While audio plays, `send` is called a few times a second with a dict of
+    the media time (seconds), the wall time it was read at (ms since the
+    epoch, comparable to Date.now() in the page) and the playing state.
+    The page extrapolates between samples on its own. One last sample with
+    playing=False goes out after a pause, then the thread sleeps until
+    wake() is called again.
+    """
+    def __init__(self, audio, send, interval=PUSH_INTERVAL):
+        super().__init__(daemon=True)
+        self.audio = audio
+        self.send = send
+        self.interval = interval
+        self.running = threading.Event()
+        # Makes the playing check and clear() atomic against wake(), so a
+        # play that races with the last sample of a pause is never missed
+        self.lock = threading.Lock()
+
+    def wake(self):
+        """Starts pushing samples; call after (re)starting playback."""
+        with self.lock:
+            self.running.set()
+
+    def sample(self):
+        return {
+            "time": self.audio.get_current_time(),
+            "wall": time.time() * 1000,
+            "playing": self.audio.is_playing()
+        }
+
+    def run(self):
+        while True:
+            self.running.wait()
+            with self.lock:
+                sample = self.sample()
+                if not sample["playing"]:
+                    self.running.clear()
+            try:
+                self.send(sample)
+            except Exception as e:
+                print(f"Error pushing playback clock: {e}")
+            if sample["playing"]:
+                time.sleep(self.interval)
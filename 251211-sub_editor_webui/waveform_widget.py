@@ -1,19 +1,44 @@
 import tkinter as tk
-import subprocess
-import struct
-import array
-import math
+from envelope import DECODE_RATE, EnvelopeLoader
+from peak_cache import PeakCache
+
+# How often a loading waveform is redrawn, in ms
+LOAD_POLL_MS = 200
+
+# Visible window limits (seconds) and the factor of one zoom step
+MIN_VISIBLE_DURATION = 2
+MAX_VISIBLE_DURATION = 4 * 3600
+ZOOM_STEP = 1.25
+
+# Canvas layers (item tags), repainted independently
+LAYERS = ('wave', 'playhead', 'markers', 'status')
+# Minimum time between repaints (about one 60 Hz display frame), in ms
+FRAME_MS = 16
 
 class WaveformWidget(tk.Canvas):
-    def __init__(self, master, on_marker_change=None, **kwargs):
+    def __init__(self, master, on_marker_change=None, cue_source=None, **kwargs):
+        if 'bg' not in kwargs:
+            kwargs['bg'] = 'black'
         super().__init__(master, **kwargs)
-        self.config(bg='black')
         self.on_marker_change = on_marker_change
-        self.audio_data = None # array of min/max pairs
-        self.sample_rate = 100 # Visual sample rate (envelopes per second)
+        # cue_source(start, end) -> subtitles overlapping that window (seconds)
+        self.cue_source = cue_source
+        self.audio_data = None # EnvelopePyramid of min/max pairs
+        self.sample_rate = 500 # Base level rate (envelopes per second)
         self.duration = 0
         self.current_time = 0
         self.visible_duration = 30 # 30 seconds
+        self.loader = None # EnvelopeLoader while a file is decoding
+        self.wave_span = None # Time span and offset of the drawn waveform polygon
+        
+        # Frame scheduling: layers waiting for a repaint and the pending after() id
+        self.dirty_layers = set(LAYERS)
+        self.frame_pending = None
+        try:
+            self.peak_cache = PeakCache()
+        except OSError as e:
+            print(f"Waveform cache disabled: {e}")
+            self.peak_cache = None
         
         # Markers
         self.start_marker_time = None
@@ -27,64 +52,88 @@ class WaveformWidget(tk.Canvas):
         self.bind('<Button-1>', self.on_click)
         self.bind('<B1-Motion>', self.on_drag)
         self.bind('<ButtonRelease-1>', self.on_release)
+        # Wheel zoom (Windows/macOS deliver <MouseWheel>, X11 buttons 4/5)
+        self.bind('<MouseWheel>', lambda event: self.zoom(ZOOM_STEP if event.delta < 0 else 1 / ZOOM_STEP))
+        self.bind('<Button-4>', lambda event: self.zoom(1 / ZOOM_STEP))
+        self.bind('<Button-5>', lambda event: self.zoom(ZOOM_STEP))
+        self.bind('<Configure>', lambda event: self.invalidate())
 
     def load_audio(self, filepath):
-        # Use ffmpeg to decode to raw s16le, 8000Hz, mono
-        # 8000Hz is enough for visual, and easy to downsample to 100Hz
-        cmd = [
-            'ffmpeg',
-            '-i', filepath,
-            '-f', 's16le',
-            '-ac', '1',
-            '-ar', '8000',
-            '-v', 'quiet',
-            '-'
-        ]
+        # Decode with ffmpeg (raw s16le, 8000Hz, mono) on a background thread;
+        # the envelope is built block by block and drawn as it grows
+        if self.loader is not None:
+            self.loader.cancel()
+            self.loader = None
+        if self.audio_data is not None:
+            self.audio_data.close() # Unmaps cached peaks
+            self.audio_data = None
         
-        try:
-            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            raw_data, _ = process.communicate()
-            
-            if not raw_data:
+        # Peaks computed for this exact file before are mapped straight from disk
+        cached = self.peak_cache.load(filepath, self.sample_rate) if self.peak_cache else None
+        if cached is not None:
+            self.audio_data = cached
+            self.duration = cached.duration if cached.duration is not None else len(cached) / cached.base_rate
+            self.invalidate('wave', 'status')
+            return
+        
+        # We need 1 min/max pair for every (8000/500) = 16 samples
+        chunk_size = int(DECODE_RATE / self.sample_rate)
+        self.loader = EnvelopeLoader(filepath, chunk_size, cache=self.peak_cache)
+        self.audio_data = self.loader.pyramid
+        self.duration = 0
+        self.loader.start()
+        self.invalidate('wave', 'status')
+        self.after(LOAD_POLL_MS, self._poll_loader, self.loader)
+
+    def _poll_loader(self, loader):
+        if loader is not self.loader:
+            return # A newer file replaced this one
+        
+        self.duration = loader.decoded_seconds
+        if loader.is_alive():
+            self.after(LOAD_POLL_MS, self._poll_loader, loader)
+        else:
+            self.loader = None
+            if loader.error is not None:
+                print(f"Error processing waveform: {loader.error}")
+            elif not self.audio_data:
                 print("Failed to read audio data")
-                return
+        self.invalidate('wave', 'status')
 
-            # Convert to array of shorts
-            samples = array.array('h', raw_data)
-            total_samples = len(samples)
-            original_rate = 8000
-            self.duration = total_samples / original_rate
-            
-            # Downsample to self.sample_rate (100Hz)
-            # We need 1 min/max pair for every (8000/100) = 80 samples
-            chunk_size = int(original_rate / self.sample_rate)
-            
-            envelope = array.array('h')
-            
-            for i in range(0, total_samples, chunk_size):
-                chunk = samples[i:i+chunk_size]
-                if not chunk:
-                    break
-                envelope.append(min(chunk))
-                envelope.append(max(chunk))
-                
-            self.audio_data = envelope
-            self.redraw()
-            
-        except Exception as e:
-            print(f"Error processing waveform: {e}")
+    def zoom(self, factor):
+        # Scale the visible window around the current time
+        self.visible_duration = min(max(self.visible_duration * factor, MIN_VISIBLE_DURATION), MAX_VISIBLE_DURATION)
+        self.invalidate('wave', 'markers')
 
     def set_position(self, time):
-        self.current_time = time
-        self.redraw()
+        if time != self.current_time:
+            self.current_time = time
+            self.invalidate('wave', 'markers')
 
     def set_markers(self, start, end):
         self.start_marker_time = start
         self.end_marker_time = end
-        self.redraw()
+        self.invalidate('markers')
+
+    def invalidate(self, *layers):
+        """
+        Marks layers (default: all of them) for repainting. Changes arriving
+        before the next frame are coalesced into a single paint.
+        """
+        self.dirty_layers.update(layers or LAYERS)
+        if self.frame_pending is None:
+            self.frame_pending = self.after(FRAME_MS, self.paint)
 
     def redraw(self):
-        self.delete('all')
+        self.invalidate()
+
+    def paint(self):
+        """Repaints the dirty layers now."""
+        if self.frame_pending is not None:
+            self.after_cancel(self.frame_pending)
+            self.frame_pending = None
+        dirty = self.dirty_layers
+        self.dirty_layers = set()
         
         width = self.winfo_width()
         height = self.winfo_height()
@@ -92,94 +141,127 @@ class WaveformWidget(tk.Canvas):
         if width <= 1 or height <= 1:
             return
 
-        # Draw Center Line (Current Time)
-        center_y = height / 2
-        self.create_line(0, center_y, width, center_y, fill='red', dash=(4, 4))
-        
-        if not self.audio_data:
-            return
-
         # Calculate visible range
         # Top (y=0) is current_time - visible_duration/2
         # Bottom (y=height) is current_time + visible_duration/2
-        
         half_window = self.visible_duration / 2
         start_time = self.current_time - half_window
         end_time = self.current_time + half_window
         
-        # Convert to envelope indices
-        # envelope has 2 values per time step (min, max)
-        # index = time * sample_rate * 2
-        
-        start_idx = int(start_time * self.sample_rate) * 2
-        end_idx = int(end_time * self.sample_rate) * 2
-        
-        # Clamp
-        data_len = len(self.audio_data)
-        
-        # We iterate pixels or data?
-        # Iterating data is better if data density < pixel density.
-        # Here sample_rate is 100Hz. 
-        # Height is ~1000px. Visible duration 180s.
-        # 180s * 100Hz = 18000 points.
-        # 18000 points on 1000px is dense.
-        # So we should iterate pixels?
-        # No, iterating data allows drawing the detailed waveform.
-        # 18000 points is fine for create_line.
-        
-        # Map time to Y
-        # y = (time - start_time) / visible_duration * height
-        
-        points = []
-        scale_x = width / 2 / 32768 # Normalize 16-bit to half width
-        
-        # Optimization: Only draw if valid range
-        iter_start = max(0, start_idx)
-        iter_end = min(data_len, end_idx)
-        
-        # Ensure alignment to pairs
-        if iter_start % 2 != 0: iter_start -= 1
-        
-        # Step size? If too many points, skip?
-        # 18000 points is okay.
-        
-        for i in range(iter_start, iter_end, 2):
-            min_val = self.audio_data[i]
-            max_val = self.audio_data[i+1]
-            
-            # Time for this data point
-            # index i corresponds to i/2 sample index
-            t = (i / 2) / self.sample_rate
-            
-            y = (t - start_time) / self.visible_duration * height
-            
-            # Draw horizontal line at y from min to max?
-            # Or draw continuous line?
-            # Usually waveform is symmetric around center X.
-            # So min_val is negative, max_val is positive.
-            # x_center = width / 2
-            # x_left = x_center + min_val * scale_x
-            # x_right = x_center + max_val * scale_x
-            # We can draw a horizontal line for this sample.
-            
-            x_center = width / 2
-            x_left = x_center + min_val * scale_x
-            x_right = x_center + max_val * scale_x
-            
-            self.create_line(x_left, y, x_right, y, fill='green')
+        if 'wave' in dirty:
+            if self.audio_data:
+                self.draw_waveform(width, height, start_time, end_time)
+            else:
+                self.clear_waveform()
+        if 'playhead' in dirty:
+            self.draw_playhead(width, height)
+        if 'markers' in dirty:
+            self.draw_markers(width, height, start_time, end_time)
+        if 'status' in dirty:
+            self.draw_status(width)
 
-        # Draw Markers
+    def draw_playhead(self, width, height):
+        # Center Line (Current Time)
+        self.delete('playhead')
+        center_y = height / 2
+        self.create_line(0, center_y, width, center_y, fill='red', dash=(4, 4), tags='playhead')
+
+    def draw_status(self, width):
+        # Loading status while the envelope is still being decoded
+        self.delete('status')
+        if self.loader is not None:
+            progress = self.loader.progress
+            if progress is None:
+                status = f"Loading waveform... {self.loader.decoded_seconds:.0f}s"
+            else:
+                status = f"Loading waveform... {progress:.0%}"
+            self.create_text(width - 10, 10, text=status, anchor='ne', fill='gray', tags='status')
+
+    def draw_markers(self, width, height, start_time, end_time):
+        self.delete('markers')
+        if not self.audio_data:
+            return
+
+        # Outlines of the cues in view
+        if self.cue_source is not None:
+            for cue in self.cue_source(start_time, end_time):
+                y0 = max(0, (cue.start_time - start_time) / self.visible_duration * height)
+                y1 = min(height, (cue.end_time - start_time) / self.visible_duration * height)
+                self.create_rectangle(1, y0, width - 1, y1, outline='#606060', tags='markers')
+
+        # Start/End Markers
         if self.start_marker_time is not None:
             y_start = (self.start_marker_time - start_time) / self.visible_duration * height
             if 0 <= y_start <= height:
-                self.create_line(0, y_start, width, y_start, fill='yellow', width=2)
-                self.create_text(10, y_start, text="START", anchor='w', fill='yellow')
+                self.create_line(0, y_start, width, y_start, fill='yellow', width=2, tags='markers')
+                self.create_text(10, y_start, text="START", anchor='w', fill='yellow', tags='markers')
 
         if self.end_marker_time is not None:
             y_end = (self.end_marker_time - start_time) / self.visible_duration * height
             if 0 <= y_end <= height:
-                self.create_line(0, y_end, width, y_end, fill='orange', width=2)
-                self.create_text(10, y_end, text="END", anchor='w', fill='orange')
+                self.create_line(0, y_end, width, y_end, fill='orange', width=2, tags='markers')
+                self.create_text(10, y_end, text="END", anchor='w', fill='orange', tags='markers')
+
+    def clear_waveform(self):
+        self.delete('wave')
+        self.wave_span = None
+
+    def draw_waveform(self, width, height, start_time, end_time):
+        """
+        Draws the envelope as one polygon covering the view plus one screen
+        above and below. While playback stays inside that span the polygon
+        is only moved; it is rebuilt when the view leaves the span or the
+        size, zoom or data change.
+        """
+        pixels_per_second = height / self.visible_duration
+        # y of the span start relative to the top of the view
+        span = self.wave_span
+        key = (width, height, self.visible_duration, len(self.audio_data))
+        if (span is not None and span['data'] is self.audio_data and span['key'] == key
+                and span['start'] <= start_time and end_time <= span['end']):
+            y = (span['start'] - start_time) * pixels_per_second
+            self.move('wave', 0, y - span['y'])
+            span['y'] = y
+            return
+
+        span_start = start_time - self.visible_duration
+        span_end = end_time + self.visible_duration
+        self.wave_span = {'data': self.audio_data, 'key': key, 'start': span_start, 'end': span_end,
+                          'y': (span_start - start_time) * pixels_per_second}
+        
+        # Pick the pyramid level with about one envelope point per pixel,
+        # so the polygon size follows the height, not the zoom
+        level = self.audio_data.level_for(pixels_per_second)
+        data = self.audio_data.levels[level]
+        rate = self.audio_data.rate(level)
+        
+        # Point indices in the span (envelope has 2 values per point: min, max)
+        first = max(0, int(span_start * rate))
+        last = min(len(data) // 2, int(span_end * rate) + 1)
+        if last - first < 2:
+            self.delete('wave')
+            return
+        
+        scale_x = width / 2 / 32768 # Normalize 16-bit to half width
+        x_center = width / 2
+        
+        # Right edge (max values) downwards, then left edge (min values) back up
+        right = []
+        left = []
+        for i in range(first, last):
+            y = (i / rate - start_time) * pixels_per_second
+            right.append(x_center + data[2 * i + 1] * scale_x)
+            right.append(y)
+            left.append(y)
+            left.append(x_center + data[2 * i] * scale_x)
+        left.reverse()
+        points = right + left
+        
+        if self.find_withtag('wave'):
+            self.coords('wave', points)
+        else:
+            self.create_polygon(points, fill='green', outline='green', tags='wave')
+        self.tag_lower('wave')
 
     def on_click(self, event):
         if not self.audio_data:
@@ -222,7 +304,8 @@ class WaveformWidget(tk.Canvas):
         elif self.dragging_marker == 'end':
             self.end_marker_time = new_time
             
-        self.redraw()
+        # Many motion events can arrive per frame; they share one repaint
+        self.invalidate('markers')
 
     def on_release(self, event):
         if self.dragging_marker and self.on_marker_change:
@@ -0,0 +1,56 @@
+import argparse
+import array
+import math
+import time
+import envelope
+from envelope import minmax_envelope
+
+RATE = 8000
+CHUNK = 80
+
+def legacy_envelope(raw_data, chunk_size):
+    # The per-chunk loop WaveformWidget.load_audio used before envelope.py
+    samples = array.array('h', raw_data)
+    result = array.array('h')
+    for i in range(0, len(samples), chunk_size):
+        chunk = samples[i:i+chunk_size]
+        if not chunk:
+            break
+        result.append(min(chunk))
+        result.append(max(chunk))
+    return result
+
+def make_pcm(seconds):
+    # A warbling tone: one second built with math, then repeated
+    second = array.array('h', (int(12000 * math.sin(i * 0.07) * math.sin(i * 0.0005)) for i in range(RATE)))
+    return second.tobytes() * int(seconds)
+
+def timed(name, func, pcm, reference=None):
+    start = time.perf_counter()
+    result = func(pcm, CHUNK)
+    elapsed = time.perf_counter() - start
+    note = ""
+    if reference is not None and result != reference:
+        note = "  (MISMATCH)"
+    print(f"{name:<8} {elapsed:8.3f}s{note}")
+    return result, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure waveform envelope extraction.")
+    parser.add_argument("--hours", type=float, default=1.0, help="Length of the synthetic audio (default: 1).")
+    args = parser.parse_args()
+
+    pcm = make_pcm(args.hours * 3600)
+    print(f"{len(pcm) / (1024 * 1024):.0f} MB of 8 kHz s16le, {len(pcm) // 2 // CHUNK} envelope points")
+
+    reference, legacy_time = timed("legacy", legacy_envelope, pcm)
+    _, python_time = timed("python", envelope._minmax_python, pcm, reference)
+    print(f"         {legacy_time / python_time:8.1f}x vs legacy")
+    if envelope.np is not None:
+        _, numpy_time = timed("numpy", minmax_envelope, pcm, reference)
+        print(f"         {legacy_time / numpy_time:8.1f}x vs legacy")
+    else:
+        print("numpy    not installed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import random
+
+class IntervalNode:
+    __slots__ = ('start', 'seq', 'end', 'item', 'priority', 'left', 'right', 'max_end')
+
+    def __init__(self, start, end, item, seq, priority):
+        self.start = start
+        self.seq = seq
+        self.end = end
+        self.item = item
+        self.priority = priority
+        self.left = None
+        self.right = None
+        self.max_end = end
+
+def _update(node):
+    max_end = node.end
+    if node.left is not None and node.left.max_end > max_end:
+        max_end = node.left.max_end
+    if node.right is not None and node.right.max_end > max_end:
+        max_end = node.right.max_end
+    node.max_end = max_end
+
+def _before(a, b):
+    return (a.start, a.seq) < (b.start, b.seq)
+
+def _merge(left, right):
+    # Every key in left sorts before every key in right
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        _update(left)
+        return left
+    right.left = _merge(left, right.left)
+    _update(right)
+    return right
+
+def _insert(root, node):
+    if root is None:
+        return node
+    if node.priority > root.priority:
+        # node becomes the root of this subtree: split root around it
+        node.left, node.right = _split(root, node)
+        _update(node)
+        return node
+    if _before(node, root):
+        root.left = _insert(root.left, node)
+    else:
+        root.right = _insert(root.right, node)
+    _update(root)
+    return root
+
+def _split(root, node):
+    # (keys before node, keys after node)
+    if root is None:
+        return None, None
+    if _before(root, node):
+        root.right, right = _split(root.right, node)
+        _update(root)
+        return root, right
+    left, root.left = _split(root.left, node)
+    _update(root)
+    return left, root
+
+def _delete(root, node):
+    if root is node:
+        return _merge(root.left, root.right)
+    if _before(node, root):
+        root.left = _delete(root.left, node)
+    else:
+        root.right = _delete(root.right, node)
+    _update(root)
+    return root
+
+def _build(nodes, lo, hi):
+    # Balanced tree over nodes sorted by key
+    if lo >= hi:
+        return None
+    mid = (lo + hi) // 2
+    node = nodes[mid]
+    node.left = _build(nodes, lo, mid)
+    node.right = _build(nodes, mid + 1, hi)
+    _update(node)
+    return node
+
+class IntervalIndex:
+    """
+    Closed intervals [start, end] in a treap ordered by start (ties in
+    insertion order), each node also holding the largest end in its
+    subtree. Insert, remove and update are O(log n) expected; a window
+    query is O(log n + k) because subtrees ending before the window are
+    skipped whole.
+
+    insert() returns the node, which is the handle for remove() and
+    update(); node.item is whatever the caller attached.
+    """
+    def __init__(self, intervals=()):
+        self.root = None
+        self.size = 0
+        self.seq = 0
+        nodes = [self._node(start, end, item) for start, end, item in intervals]
+        if nodes:
+            nodes.sort(key=lambda n: (n.start, n.seq))
+            self._bulk_load(nodes)
+
+    def _node(self, start, end, item):
+        self.seq += 1
+        return IntervalNode(start, end, item, self.seq, random.random())
+
+    def _bulk_load(self, nodes):
+        # Hand out sorted random priorities in breadth-first order so the
+        # balanced tree is also a valid heap, i.e. a treap like insert() builds
+        self.root = _build(nodes, 0, len(nodes))
+        self.size = len(nodes)
+        priorities = sorted((random.random() for _ in nodes), reverse=True)
+        level = [self.root]
+        i = 0
+        while level:
+            next_level = []
+            for node in level:
+                node.priority = priorities[i]
+                i += 1
+                if node.left is not None:
+                    next_level.append(node.left)
+                if node.right is not None:
+                    next_level.append(node.right)
+            level = next_level
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        """Yields items in start order."""
+        return (node.item for node in self.nodes())
+
+    def nodes(self):
+        """Yields the nodes (handles) in start order."""
+        stack = []
+        node = self.root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node
+            node = node.right
+
+    def insert(self, start, end, item):
+        node = self._node(start, end, item)
+        self.root = _insert(self.root, node)
+        self.size += 1
+        return node
+
+    def remove(self, node):
+        self.root = _delete(self.root, node)
+        node.left = node.right = None
+        self.size -= 1
+
+    def update(self, node, start, end):
+        """Moves an interval to new bounds; the node stays a valid handle."""
+        self.root = _delete(self.root, node)
+        self.seq += 1
+        node.start, node.end, node.seq = start, end, self.seq
+        node.left = node.right = None
+        node.max_end = end
+        node.priority = random.random()
+        self.root = _insert(self.root, node)
+
+    def overlapping(self, lo, hi):
+        """Items whose interval intersects [lo, hi], in start order."""
+        found = []
+        stack = []
+        node = self.root
+        while stack or node is not None:
+            # Descend left while the subtree can still reach lo
+            while node is not None and node.max_end >= lo:
+                stack.append(node)
+                node = node.left
+            if not stack:
+                break
+            node = stack.pop()
+            if node.start > hi:
+                # Everything after this node starts later still
+                break
+            if node.end >= lo:
+                found.append(node.item)
+            node = node.right
+        return found
+
+    def first_starting_at(self, time):
+        """The first item (in start order) starting at or after time, or None."""
+        best = None
+        node = self.root
+        while node is not None:
+            if node.start >= time:
+                best = node
+                node = node.left
+            else:
+                node = node.right
+        return best.item if best is not None else None
@@ -45,7 +45,7 @@ class VoiceSubtitleEditor:
         self.a_time.grid(row=0, column=0, columnspan=5, sticky="ew", pady=(0, 20))
 
         # --- Row 1: Waveform (Canvas) ---
-        self.a_wave = WaveformWidget(main_frame, bg="#d0d0d0", highlightthickness=1, highlightbackground="gray", on_marker_change=self.update_subtitle_timing)
+        self.a_wave = WaveformWidget(main_frame, bg="#d0d0d0", highlightthickness=1, highlightbackground="gray", on_marker_change=self.update_subtitle_timing, cue_source=self.subs.get_subtitles_in_range)
         self.a_wave.grid(row=1, column=0, columnspan=5, sticky="nsew", pady=(0, 20))
         main_frame.rowconfigure(1, weight=1)
 
@@ -158,6 +158,12 @@ class VoiceSubtitleEditor:
     def save_file(self):
         if not self.subs.subtitles:
             return
+        overlaps = self.subs.find_overlaps()
+        if overlaps:
+            first, second = overlaps[0]
+            if not messagebox.askyesno("Overlapping Subtitles",
+                                       f"{len(overlaps)} pair(s) of subtitles overlap, first #{first.index} and #{second.index}. Save anyway?"):
+                return
         path = filedialog.asksaveasfilename(defaultextension=".srt", filetypes=[("Subtitle Files", "*.srt")])
         if path:
             self.subs.save_srt(path)
@@ -0,0 +1,263 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from envelope import EnvelopePyramid
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'antigravity-peaks')
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024  # 512 MB
+
+# Bytes hashed from the start, middle and end of the audio file
+SAMPLE_BYTES = 1024 * 1024
+
+# .peaks file: magic, version, base rate, duration, level count, then one
+# length (in int16 values) per level, then the levels back to back
+MAGIC = b'PEAK'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sIddI')
+LEVEL_LENGTH = struct.Struct('<Q')
+
+def content_digest(path, size):
+    """
+    Hashes the start, middle and end of a file: enough to tell edited or
+    replaced audio apart without reading hours of it.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        digest.update(f.read(SAMPLE_BYTES))
+        if size > 3 * SAMPLE_BYTES:
+            f.seek(size // 2)
+            digest.update(f.read(SAMPLE_BYTES))
+            f.seek(-SAMPLE_BYTES, os.SEEK_END)
+        digest.update(f.read(SAMPLE_BYTES))
+    return digest.hexdigest()
+
+def source_signature(path):
+    """
+    Returns a digest of an audio file's size, mtime and partial content
+    hash; it changes whenever the file is edited or replaced.
+    """
+    st = os.stat(path)
+    payload = json.dumps([st.st_size, st.st_mtime_ns, content_digest(path, st.st_size)])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def peak_key(path, base_rate, signature=None):
+    """
+    Returns the cache key for an audio file: its source_signature(), plus
+    the envelope base rate and file format version.
+    """
+    if signature is None:
+        signature = source_signature(path)
+    payload = json.dumps([signature, float(base_rate), FORMAT_VERSION])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def write_peaks(path, pyramid):
+    duration = pyramid.duration if pyramid.duration is not None else float('nan')
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, pyramid.base_rate, duration, len(pyramid.levels)))
+            for level in pyramid.levels:
+                f.write(LEVEL_LENGTH.pack(len(level)))
+            for level in pyramid.levels:
+                f.write(level)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+class MappedPeaks(EnvelopePyramid):
+    """
+    EnvelopePyramid whose levels are int16 views into a memory-mapped
+    .peaks file. It owns the mapping: close() (or leaving a with block)
+    releases the views and unmaps the file, after which the levels can no
+    longer be read.
+    """
+    def __init__(self, mapped, views, base_rate, levels):
+        super().__init__(base_rate, levels=levels)
+        self._mapped = mapped
+        self._views = views
+
+    def close(self):
+        if self._mapped is None:
+            return
+        # Views must be released before the mapping can close
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._mapped.close()
+        self._mapped = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def map_peaks(path):
+    """
+    Memory-maps a .peaks file and returns a MappedPeaks whose levels are
+    int16 views straight into the mapping. Raises ValueError if the file
+    is not a complete peaks file of this version.
+    """
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    views = []
+    try:
+        return _map_levels(mapped, views)
+    except Exception:
+        for view in reversed(views):
+            view.release()
+        mapped.close()
+        raise
+
+def _map_levels(mapped, views):
+    view = memoryview(mapped)
+    views.append(view)
+    if len(view) < HEADER.size:
+        raise ValueError("truncated peaks file")
+    magic, version, base_rate, duration, level_count = HEADER.unpack_from(view, 0)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError("not a peaks file")
+
+    offset = HEADER.size
+    lengths = []
+    for _ in range(level_count):
+        lengths.append(LEVEL_LENGTH.unpack_from(view, offset)[0])
+        offset += LEVEL_LENGTH.size
+    if offset + 2 * sum(lengths) != len(view):
+        raise ValueError("truncated peaks file")
+
+    levels = []
+    for length in lengths:
+        level_bytes = view[offset:offset + 2 * length]
+        levels.append(level_bytes.cast('h'))
+        views += [level_bytes, levels[-1]]
+        offset += 2 * length
+    pyramid = MappedPeaks(mapped, views, base_rate, levels)
+    pyramid.duration = None if duration != duration else duration  # NaN: unknown
+    return pyramid
+
+class PeakCache:
+    """
+    On-disk cache of waveform pyramids keyed by peak_key().
+
+    Each pyramid is one .peaks file in cache_dir, listed in an index.json
+    with its source path and signature, size and last access time.
+    Reopening a file maps the peaks instead of decoding the audio again.
+    Entries are dropped as soon as their source file changes (entries for
+    the same file at other base rates are kept), and the least recently used entries
+    are evicted once the cache grows past max_bytes.
+    """
+    INDEX_NAME = 'index.json'
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(cache_dir, self.INDEX_NAME)
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self.entries = self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return {k: e for k, e in entries.items()
+                if os.path.exists(os.path.join(self.cache_dir, e['file']))}
+
+    def load(self, audio_path, base_rate):
+        """
+        Returns the cached MappedPeaks for audio_path, or None on a miss.
+        The caller closes it once the pyramid is no longer drawn.
+        """
+        try:
+            signature = source_signature(audio_path)
+        except OSError:
+            return None
+        key = peak_key(audio_path, base_rate, signature)
+        source = os.path.abspath(audio_path)
+
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                # Peaks of an older version of this file are stale now
+                if self._drop_stale_locked(source, signature):
+                    self._save_locked()
+                return None
+            path = os.path.join(self.cache_dir, entry['file'])
+            try:
+                pyramid = map_peaks(path)
+            except (OSError, ValueError, struct.error):
+                self._remove_locked(key)
+                self._save_locked()
+                return None
+            entry['last_access'] = time.time()
+            self._save_locked()
+            return pyramid
+
+    def save(self, audio_path, pyramid):
+        """Writes a finished pyramid for audio_path into the cache."""
+        try:
+            signature = source_signature(audio_path)
+        except OSError:
+            return
+        key = peak_key(audio_path, pyramid.base_rate, signature)
+        filename = key + '.peaks'
+        path = os.path.join(self.cache_dir, filename)
+        write_peaks(path, pyramid)
+
+        source = os.path.abspath(audio_path)
+        with self._lock:
+            self._drop_stale_locked(source, signature)
+            self.entries[key] = {
+                'file': filename,
+                'source': source,
+                'signature': signature,
+                'size': os.path.getsize(path),
+                'last_access': time.time(),
+            }
+            self._evict_locked()
+            self._save_locked()
+
+    def _drop_stale_locked(self, source, signature):
+        stale = [k for k, e in self.entries.items()
+                 if e.get('source') == source and e.get('signature') != signature]
+        for key in stale:
+            self._remove_locked(key)
+        return bool(stale)
+
+    def _remove_locked(self, key):
+        try:
+            os.remove(os.path.join(self.cache_dir, self.entries[key]['file']))
+        except OSError:
+            # Still mapped (Windows); the index forgets it and it is overwritten later
+            pass
+        del self.entries[key]
+
+    def _evict_locked(self):
+        total = sum(e['size'] for e in self.entries.values())
+        # Oldest access first
+        for key, entry in sorted(self.entries.items(), key=lambda kv: kv[1]['last_access']):
+            if total <= self.max_bytes:
+                break
+            total -= entry['size']
+            self._remove_locked(key)
+
+    def _save_locked(self):
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f)
+            os.replace(tmp_path, self.index_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
@@ -1,84 +1,138 @@
-import re
-from dataclasses import dataclass
-from typing import List, Optional
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+from cue_timeline import CueTimeline, seconds_to_ms
+from interval_index import IntervalIndex
 
 @dataclass
 class Subtitle:
     index: int
-    start_time: float  # in seconds
-    end_time: float    # in seconds
+    start_ms: int  # integer milliseconds
+    end_ms: int    # integer milliseconds
     text: str
+    # Set by SubtitleManager so timing edits keep its lookup index in order
+    cue_index: Optional["CueIndex"] = field(default=None, init=False, repr=False, compare=False)
+
+    def __setattr__(self, name, value):
+        index = self.__dict__.get('cue_index')
+        if index is not None and name in ('start_ms', 'end_ms'):
+            index.retime(self, name, value)
+        else:
+            object.__setattr__(self, name, value)
+
+    # Seconds views for the UI; assignments are rounded to whole milliseconds
+    @property
+    def start_time(self) -> float:
+        return self.start_ms / 1000.0
+
+    @start_time.setter
+    def start_time(self, value: float):
+        self.start_ms = seconds_to_ms(value)
+
+    @property
+    def end_time(self) -> float:
+        return self.end_ms / 1000.0
+
+    @end_time.setter
+    def end_time(self, value: float):
+        self.end_ms = seconds_to_ms(value)
 
     @property
     def duration(self):
         return self.end_time - self.start_time
 
+class CueIndex:
+    """
+    Subtitles in an IntervalIndex keyed by their millisecond timings, so
+    point and window lookups are logarithmic even with overlapping cues.
+    """
+    def __init__(self, subs=()):
+        self.intervals = IntervalIndex((s.start_ms, s.end_ms, s) for s in subs)
+        self.nodes = {id(node.item): node for node in self.intervals.nodes()}
+
+    def __len__(self):
+        return len(self.intervals)
+
+    def __iter__(self):
+        return iter(self.intervals)
+
+    def add(self, sub: Subtitle):
+        self.nodes[id(sub)] = self.intervals.insert(sub.start_ms, sub.end_ms, sub)
+
+    def remove(self, sub: Subtitle):
+        self.intervals.remove(self.nodes.pop(id(sub)))
+
+    def retime(self, sub: Subtitle, name: str, value: int):
+        """Applies a start_ms/end_ms assignment and repositions the cue."""
+        object.__setattr__(sub, name, value)
+        self.intervals.update(self.nodes[id(sub)], sub.start_ms, sub.end_ms)
+
+    def at(self, time_ms: int) -> Optional[Subtitle]:
+        """The latest-starting cue containing time_ms, or None."""
+        found = self.intervals.overlapping(time_ms, time_ms)
+        return found[-1] if found else None
+
+    def overlapping(self, start_ms: int, end_ms: int) -> List[Subtitle]:
+        """Cues intersecting [start_ms, end_ms], in start order."""
+        return self.intervals.overlapping(start_ms, end_ms)
+
 class SubtitleManager:
     def __init__(self):
         self.subtitles: List[Subtitle] = []
         self.filepath: Optional[str] = None
+        self.cue_index = CueIndex()
+
+    def _attach(self, sub: Subtitle):
+        object.__setattr__(sub, 'cue_index', self.cue_index)
 
     def load_srt(self, filepath: str):
         self.filepath = filepath
-        self.subtitles = []
-        
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        # Split by double newlines, handling potential variations
-        blocks = re.split(r'\n\s*\n', content.strip())
-        
-        for block in blocks:
-            if not block.strip():
-                continue
-                
-            lines = block.strip().split('\n')
-            if len(lines) >= 3:
-                # Index
-                try:
-                    index = int(lines[0].strip())
-                except ValueError:
-                    continue # Skip malformed blocks
-                
-                # Time
-                time_line = lines[1].strip()
-                match = re.match(r'(\d{2}):(\d{2}):(\d{2}),(\d{3}) --> (\d{2}):(\d{2}):(\d{2}),(\d{3})', time_line)
-                if match:
-                    h1, m1, s1, ms1, h2, m2, s2, ms2 = map(int, match.groups())
-                    start = h1*3600 + m1*60 + s1 + ms1/1000.0
-                    end = h2*3600 + m2*60 + s2 + ms2/1000.0
-                    
-                    # Text (rest of the lines)
-                    text = '\n'.join(lines[2:])
-                    
-                    self.subtitles.append(Subtitle(index, start, end, text))
+        timeline = CueTimeline.load_srt(filepath)
+        self.subtitles = [Subtitle(i + 1, start, end, text)
+                          for i, (start, end, text) in enumerate(timeline)]
+        self.cue_index = CueIndex(self.subtitles)
+        for sub in self.subtitles:
+            self._attach(sub)
+
+    def to_timeline(self) -> CueTimeline:
+        timeline = CueTimeline()
+        for sub in self.subtitles:
+            timeline.append(sub.start_ms, sub.end_ms, sub.text)
+        return timeline
 
     def save_srt(self, filepath: str):
-        with open(filepath, 'w', encoding='utf-8') as f:
-            for i, sub in enumerate(self.subtitles):
-                # Update index to match position in list (1-based)
-                sub.index = i + 1
-                
-                start_h = int(sub.start_time // 3600)
-                start_m = int((sub.start_time % 3600) // 60)
-                start_s = int(sub.start_time % 60)
-                start_ms = int((sub.start_time * 1000) % 1000)
-                
-                end_h = int(sub.end_time // 3600)
-                end_m = int((sub.end_time % 3600) // 60)
-                end_s = int(sub.end_time % 60)
-                end_ms = int((sub.end_time * 1000) % 1000)
-                
-                time_str = f"{start_h:02}:{start_m:02}:{start_s:02},{start_ms:03} --> {end_h:02}:{end_m:02}:{end_s:02},{end_ms:03}"
-                
-                f.write(f"{sub.index}\n{time_str}\n{sub.text}\n\n")
+        # Update index to match position in list (1-based)
+        for i, sub in enumerate(self.subtitles):
+            sub.index = i + 1
+        self.to_timeline().save(filepath, 'srt')
 
     def get_subtitle_at_time(self, time: float) -> Optional[Subtitle]:
-        # Find subtitle that contains time
+        # Find subtitle that contains time; with overlaps, the one that started last
+        return self.cue_index.at(seconds_to_ms(time))
+
+    def get_subtitles_in_range(self, start_time: float, end_time: float) -> List[Subtitle]:
+        # Subtitles overlapping [start_time, end_time], in start order
+        return self.cue_index.overlapping(seconds_to_ms(start_time), seconds_to_ms(end_time))
+
+    def find_overlaps(self) -> List[Tuple[Subtitle, Subtitle]]:
+        # Pairs of subtitles whose times overlap (touching ends do not count),
+        # earlier list position first
+        positions = {id(sub): i for i, sub in enumerate(self.subtitles)}
+        pairs = []
         for sub in self.subtitles:
-            if sub.start_time <= time <= sub.end_time:
-                return sub
-        return None
+            for other in self.cue_index.overlapping(sub.start_ms + 1, sub.end_ms - 1):
+                if positions[id(other)] > positions[id(sub)]:
+                    pairs.append((sub, other))
+        return pairs
+
+    def shift_subtitles(self, from_time: float, delta: float):
+        # Ripple edit: moves every subtitle starting at or after from_time by delta seconds
+        from_ms = seconds_to_ms(from_time)
+        delta_ms = seconds_to_ms(delta)
+        moved = [sub for sub in self.cue_index.overlapping(from_ms, float('inf')) if sub.start_ms >= from_ms]
+        for sub in moved:
+            sub.start_ms += delta_ms
+            sub.end_ms += delta_ms
+        return moved
 
     def get_subtitle_by_index(self, index: int) -> Optional[Subtitle]:
         # 1-based index
@@ -95,10 +149,12 @@ class SubtitleManager:
         Inserts a subtitle at the specified index (0-based list index).
         If insert_at is -1, appends to the end.
         """
-        new_sub = Subtitle(index=0, start_time=start_time, end_time=end_time, text=text)
+        new_sub = Subtitle(index=0, start_ms=seconds_to_ms(start_time), end_ms=seconds_to_ms(end_time), text=text)
         if insert_at == -1:
             self.subtitles.append(new_sub)
         else:
             self.subtitles.insert(insert_at, new_sub)
+        self.cue_index.add(new_sub)
+        self._attach(new_sub)
         self.reindex_subtitles()
         return new_sub
@@ -10,7 +10,8 @@ import threading
 import tempfile
 import time
 import glob
-import sys
+from tts_cache import TTSCache, cache_key
+from tts_prefetch import SynthesisPrefetcher, DEFAULT_WORKERS
 
 # Ensure nltk tokenizer is available
 try:
@@ -21,11 +22,19 @@ except LookupError:
     nltk.download('punkt')
     nltk.download('punkt_tab')
 
+# Sentences synthesized ahead of the one playing
+PREFETCH_AHEAD = 4
+
 class Api:
-    def __init__(self):
+    def __init__(self, prefetch_ahead=PREFETCH_AHEAD, prefetch_workers=DEFAULT_WORKERS):
         self._window = None
         self.sentences = []
         self._playing = False
+        # Bumped by every play(), so a loop left over from a jump exits
+        self._generation = 0
+        self._cache = TTSCache()
+        self.prefetch_ahead = prefetch_ahead
+        self._prefetcher = SynthesisPrefetcher(self._synthesize, prefetch_workers)
         pygame.mixer.init()
 
     def set_window(self, window):
@@ -131,37 +140,70 @@ class Api:
             self._window.evaluate_js(f"update_index({start_idx + 1})")
             
         self._playing = True
+        self._generation += 1
         
         # Start playback in a daemon thread so it doesn't block pywebview
-        t = threading.Thread(target=self._playback_loop, args=(start_idx, lang))
+        t = threading.Thread(target=self._playback_loop, args=(start_idx, lang, self._generation))
         t.daemon = True
         t.start()
         return True
 
     def stop(self):
         self._playing = False
+        # Drop queued synthesis; clips already in progress still reach the cache
+        self._prefetcher.want([])
         pygame.mixer.music.stop()
         return True
 
     def clear_cache(self):
-        """Clear the audio cache from temp directory"""
+        """Clear the shared audio cache (and files left by older versions in the temp directory)"""
         temp_dir = tempfile.gettempdir()
         try:
-            # Delete all cached tts mp3 files
+            removed = self._cache.clear()
+            # Delete cached tts mp3 files from the old per-process naming scheme
             files = glob.glob(os.path.join(temp_dir, "tts_cache_*.mp3"))
             for f in files:
                 os.remove(f)
-            print(f"Cleared {len(files)} cached audio files.")
+            print(f"Cleared {removed + len(files)} cached audio files.")
             return True
         except Exception as e:
             print(f"Error clearing cache: {e}")
             return False
 
-    def _playback_loop(self, start_idx, lang):
-        temp_dir = tempfile.gettempdir()
-        
+    def _synthesize(self, sentence, lang):
+        """Returns the cached clip for a sentence, generating it on a miss. Runs on prefetch workers."""
+        # Key on content, not position, so edited texts still hit the
+        # cache and the key survives restarts (hash() is salted per process)
+        key = cache_key(sentence, lang, 'gtts', 'com')
+        entry = self._cache.get(key)
+        if entry is not None:
+            return entry['path']
+
+        # Cache miss: generate
+        temp_audio_path = os.path.join(tempfile.gettempdir(), f"tts_tmp_{key}.mp3")
+        tts = gTTS(text=sentence, lang=lang)
+        tts.save(temp_audio_path)
+        audio_path = self._cache.put(key, temp_audio_path)
+        os.remove(temp_audio_path)
+        print(f"Cache miss: Generated audio for \"{sentence[:40]}\"")
+        return audio_path
+
+    def _prefetch(self, idx, lang):
+        # Sentence idx first, then the next prefetch_ahead non-empty ones
+        clips = []
+        for sentence in self.sentences[idx:]:
+            if len(clips) > self.prefetch_ahead:
+                break
+            if sentence.strip():
+                clips.append((cache_key(sentence, lang, 'gtts', 'com'), sentence, lang))
+        self._prefetcher.want(clips)
+
+    def _playback_loop(self, start_idx, lang, generation):
+        def active():
+            return self._playing and self._generation == generation
+
         for i in range(start_idx, len(self.sentences)):
-            if not self._playing:
+            if not active():
                 break
                 
             sentence = self.sentences[i]
@@ -171,36 +213,30 @@ class Api:
             self._window.evaluate_js(f"update_index({i + 1})")
             
             try:
-                # Use a specific naming convention to associate with index/content
-                # we will include the language and a hash of the text to be safe
-                text_hash = hash(sentence) % ((sys.maxsize + 1) * 2)
-                cache_filename = f"tts_cache_{i}_{lang}_{text_hash}.mp3"
-                temp_audio_path = os.path.join(temp_dir, cache_filename)
+                # The following sentences synthesize while this one plays
+                self._prefetch(i, lang)
+                audio_path = self._prefetcher.wait(cache_key(sentence, lang, 'gtts', 'com'), active)
+                if audio_path is None:
+                    break
                 
-                # Check cache
-                if not os.path.exists(temp_audio_path):
-                    # Cache miss: generate
-                    tts = gTTS(text=sentence, lang=lang)
-                    tts.save(temp_audio_path)
-                    print(f"Cache miss: Generated audio for sentence {i}")
-                else:
-                    print(f"Cache hit: Playing existing audio for sentence {i}")
-                
-                pygame.mixer.music.load(temp_audio_path)
+                pygame.mixer.music.load(audio_path)
                 pygame.mixer.music.play()
                 
-                while pygame.mixer.music.get_busy() and self._playing:
+                while pygame.mixer.music.get_busy() and active():
                     time.sleep(0.1)
                     
             except Exception as e:
                 print(f"Error playing sentence {i}: {e}")
                 
             # Move index to NEXT sentence for UI (according to spec)
-            if self._playing and i + 1 < len(self.sentences):
+            if active() and i + 1 < len(self.sentences):
                  self._window.evaluate_js(f"update_index({i + 2})")
                  
-        self._playing = False
-        self._window.evaluate_js("on_playback_stopped()")
+        self._cache.flush()
+        # Unless a jump started a newer loop, which owns the playing state now
+        if self._generation == generation:
+            self._playing = False
+            self._window.evaluate_js("on_playback_stopped()")
 
 if __name__ == '__main__':
     api = Api()
@@ -0,0 +1,260 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+
+# Shared by txt_to_srt and tts-py, so both tools hit the same clips
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'antigravity-tts')
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024  # 1 GB
+DEFAULT_MAX_AGE = 90 * 24 * 3600       # 90 days
+
+def cache_key(text, lang, engine, voice=''):
+    """
+    Returns a stable digest for a synthesis request.
+    Unlike hash(), the result is the same in every process.
+    """
+    payload = json.dumps([text, lang, engine, voice], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+_KEY_FILE = re.compile(r'^[0-9a-f]{64}\.\w+$')
+
+def _atomic_write_json(path, data):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+class _IndexLock:
+    """
+    Lock file guarding the shared index across processes.
+
+    Created with O_EXCL so it works the same on Windows and POSIX;
+    a lock left behind by a crashed process is broken after STALE seconds.
+    """
+    STALE = 30.0
+
+    def __init__(self, path, timeout=2 * STALE):
+        # Waiters outlast STALE, so a lock left by a killed process is broken
+        # before they give up
+        self.path = path
+        self.timeout = timeout
+
+    def __enter__(self):
+        deadline = time.time() + self.timeout
+        while True:
+            try:
+                os.close(os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return self
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(self.path) > self.STALE:
+                        os.remove(self.path)
+                        continue
+                except OSError:
+                    continue
+                if time.time() > deadline:
+                    raise TimeoutError(f"Cache index is locked: {self.path}")
+                time.sleep(0.05)
+
+    def __exit__(self, *exc):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+class TTSCache:
+    """
+    On-disk audio cache keyed by cache_key().
+
+    Clips live in cache_dir next to an index.json that records size,
+    duration and last access time. Writes are atomic (temp file + rename),
+    and the least recently used clips are evicted once the cache grows past
+    max_bytes or a clip has not been used for max_age seconds.
+
+    Other processes may use the same directory: every index write re-reads
+    the index under a lock file and merges it with this process's changes.
+    """
+    INDEX_NAME = 'index.json'
+    LOCK_NAME = 'index.lock'
+    SAVE_INTERVAL = 2.0  # seconds between index writes
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.index_path = os.path.join(cache_dir, self.INDEX_NAME)
+        self._file_lock = _IndexLock(os.path.join(cache_dir, self.LOCK_NAME))
+        self._lock = threading.Lock()
+        self._removed = set() # Keys deleted here since the last save
+        self._dirty = False
+        self._last_save = 0.0
+        os.makedirs(cache_dir, exist_ok=True)
+        self.entries = self._load_index()
+        self._adopt_orphans()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # Drop entries whose clip was removed behind our back
+        return {k: e for k, e in entries.items()
+                if os.path.exists(os.path.join(self.cache_dir, e['file']))}
+
+    def _adopt_orphans(self):
+        # Clips whose index entry was lost (e.g. a crash before the index
+        # was saved) are tracked again, so eviction can still reach them
+        known = {e['file'] for e in self.entries.values()}
+        for name in os.listdir(self.cache_dir):
+            if name in known or not _KEY_FILE.match(name):
+                continue
+            try:
+                st = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            self.entries[os.path.splitext(name)[0]] = {
+                'file': name,
+                'size': st.st_size,
+                'duration': None,
+                'created': st.st_mtime,
+                'last_access': st.st_mtime,
+            }
+            self._dirty = True
+
+    def get(self, key):
+        """
+        Returns the index entry for key (with an absolute 'path'), or None on a miss.
+        """
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            path = os.path.join(self.cache_dir, entry['file'])
+            if not os.path.exists(path):
+                del self.entries[key]
+                self._removed.add(key)
+                self._dirty = True
+                return None
+            entry['last_access'] = time.time()
+            self._dirty = True
+            return dict(entry, path=path)
+
+    def put(self, key, src_path, duration=None):
+        """
+        Copies src_path into the cache under key and returns the cached path.
+        """
+        extension = os.path.splitext(src_path)[1]
+        filename = key + extension
+        path = os.path.join(self.cache_dir, filename)
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        os.close(fd)
+        try:
+            shutil.copyfile(src_path, tmp_path)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        now = time.time()
+        with self._lock:
+            self._removed.discard(key)
+            self.entries[key] = {
+                'file': filename,
+                'size': os.path.getsize(path),
+                'duration': duration,
+                'created': now,
+                'last_access': now,
+            }
+            self._dirty = True
+            self._evict_locked()
+            self._maybe_save_locked()
+        return path
+
+    def _evict_locked(self):
+        now = time.time()
+        total = sum(e['size'] for e in self.entries.values())
+        # Oldest access first
+        for key, entry in sorted(self.entries.items(), key=lambda kv: kv[1]['last_access']):
+            expired = now - entry['last_access'] > self.max_age
+            if not expired and total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, entry['file']))
+            except OSError:
+                # Still in use (e.g. being played on Windows); try again next time
+                continue
+            total -= entry['size']
+            del self.entries[key]
+            self._removed.add(key)
+
+    def _merge_index_locked(self):
+        # Picks up what other processes wrote since we last looked; the most
+        # recent access wins, and keys we deleted stay deleted
+        for key, entry in self._load_index().items():
+            if key in self._removed:
+                continue
+            ours = self.entries.get(key)
+            if ours is None:
+                self.entries[key] = entry
+            elif entry['last_access'] > ours['last_access']:
+                ours['last_access'] = entry['last_access']
+
+    def _maybe_save_locked(self):
+        if time.time() - self._last_save >= self.SAVE_INTERVAL:
+            self._save_locked()
+
+    def _save_locked(self):
+        # Best effort: a clip already in the cache must not fail synthesis
+        # because the index could not be written. The index stays dirty and
+        # is written on a later put() or flush().
+        self._last_save = time.time()
+        try:
+            with self._file_lock:
+                self._merge_index_locked()
+                self._evict_locked()
+                _atomic_write_json(self.index_path, self.entries)
+        except OSError as e:
+            # Includes TimeoutError from a lock held by another process
+            print(f"TTS cache index not saved: {e}")
+            return
+        self._removed.clear()
+        self._dirty = False
+
+    def flush(self):
+        """Writes the index to disk if it changed."""
+        with self._lock:
+            if self._dirty:
+                self._save_locked()
+
+    def clear(self):
+        """Removes every cached clip. Returns the number of clips removed."""
+        with self._lock:
+            try:
+                with self._file_lock:
+                    self._merge_index_locked()
+            except OSError as e:
+                # Clips other processes added since are left for the next clear()
+                print(f"TTS cache index not merged: {e}")
+            removed = 0
+            for key, entry in list(self.entries.items()):
+                try:
+                    os.remove(os.path.join(self.cache_dir, entry['file']))
+                    removed += 1
+                except OSError:
+                    continue
+                del self.entries[key]
+                self._removed.add(key)
+            self._save_locked()
+            return removed
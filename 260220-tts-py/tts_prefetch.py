@@ -0,0 +1,92 @@
+import threading
+
+DEFAULT_WORKERS = 3
+
+class SynthesisPrefetcher:
+    """
+    Synthesizes upcoming sentences on a small worker pool, so playback
+    doesn't stall on the network between sentences.
+
+    want() replaces the list of clips wanted, most urgent first. Workers
+    always take the most urgent clip that is neither ready nor in progress,
+    so after a jump the new position is served first and clips no longer
+    wanted drop out of the queue (ones already being synthesized still
+    finish). wait() blocks until one clip is ready and returns its path.
+    """
+    def __init__(self, synthesize, workers=DEFAULT_WORKERS):
+        # synthesize(text, lang) -> audio path; called on worker threads
+        self.synthesize = synthesize
+        self.cond = threading.Condition()
+        self.wanted = []    # keys, most urgent first
+        self.jobs = {}      # key -> (text, lang)
+        self.running = set()
+        self.ready = {}     # key -> audio path
+        self.errors = {}    # key -> exception
+        for _ in range(workers):
+            threading.Thread(target=self._work, daemon=True).start()
+
+    def want(self, clips):
+        """
+        Sets the clips to synthesize, as (key, text, lang) tuples in
+        priority order. An empty list cancels everything not yet started.
+        """
+        with self.cond:
+            self.wanted = []
+            self.jobs = {}
+            for key, text, lang in clips:
+                if key not in self.jobs:
+                    self.wanted.append(key)
+                    self.jobs[key] = (text, lang)
+            # Forget results nobody is going to ask for
+            self.ready = {k: p for k, p in self.ready.items() if k in self.jobs}
+            self.errors = {k: e for k, e in self.errors.items() if k in self.jobs}
+            self.cond.notify_all()
+
+    def wait(self, key, keep_waiting):
+        """
+        Returns the audio path for a wanted key once it is ready, or None
+        as soon as keep_waiting() turns false. Re-raises a synthesis error.
+        """
+        with self.cond:
+            while keep_waiting():
+                if key in self.ready:
+                    return self.ready[key]
+                if key in self.errors:
+                    # Not retried until it is wanted again
+                    self.wanted.remove(key)
+                    del self.jobs[key]
+                    raise self.errors.pop(key)
+                # Timed, so a stop is noticed without a notify
+                self.cond.wait(0.1)
+        return None
+
+    def _next_job_locked(self):
+        for key in self.wanted:
+            if key not in self.ready and key not in self.errors and key not in self.running:
+                return key
+        return None
+
+    def _work(self):
+        while True:
+            with self.cond:
+                key = self._next_job_locked()
+                while key is None:
+                    self.cond.wait()
+                    key = self._next_job_locked()
+                text, lang = self.jobs[key]
+                self.running.add(key)
+
+            path = error = None
+            try:
+                path = self.synthesize(text, lang)
+            except Exception as e:
+                error = e
+
+            with self.cond:
+                self.running.discard(key)
+                if key in self.jobs:
+                    if error is None:
+                        self.ready[key] = path
+                    else:
+                        self.errors[key] = error
+                self.cond.notify_all()